@@ -1,2 +1,8 @@
 from . import models
-from . import controllers
\ No newline at end of file
+from . import controllers
+
+
+def post_init_hook(env):
+    """Initialise the stock status from existing quants and the B2B tiers from product prices"""
+    env['product.template']._rebuild_fashion_stock_status()
+    env['fashion.b2b.price.tier']._sync_product_tiers()
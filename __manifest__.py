@@ -24,10 +24,16 @@
         'data/demo_data.xml',
         'data/website_configuration.xml',
         'data/website_pages.xml',
+        'data/ir_actions_server_data.xml',
+        'data/ir_cron_data.xml',
+        'data/mail_template_data.xml',
         'views/product_views.xml',
         'views/sale_order_views.xml',
         'views/wishlist_views.xml',
         'views/review_views.xml',
+        'views/inventory_report_views.xml',
+        'views/invoice_queue_views.xml',
+        'views/tracking_import_views.xml',
         'views/ecommerce_templates.xml',
         'views/website_templates.xml',
         'views/website_pages.xml',
@@ -42,6 +48,8 @@
         ],
     },
 
+    'post_init_hook': 'post_init_hook',
+
     'application': True,
     'installable': True,
 }
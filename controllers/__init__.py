@@ -3,3 +3,4 @@ from . import main
 from . import ecommerce
 from . import search
 from . import wishlist_review
+from . import inventory
@@ -2,10 +2,27 @@ from odoo import http
 from odoo.http import request
 from odoo.addons.website_sale.controllers.main import WebsiteSale
 from odoo.exceptions import ValidationError, UserError
+from odoo.service.model import PG_CONCURRENCY_ERRORS_TO_RETRY
+from odoo.tools.json import scriptsafe as json_scriptsafe
+from odoo.addons.fashion_ecommerce.tools.cache import FashionCache, get_version
+from psycopg2 import OperationalError
+from urllib.parse import urlencode
+import csv
+import io
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+BULK_CART_MAX_LINES = 500
+
+# Rendered tracking fragments per user and tracking number, misses included
+_tracking_cache = FashionCache(size=4096, ttl=30)
+_NOT_CACHED = object()
+
+# Rendered B2B catalog pages per commercial partner and filters
+_b2b_catalog_cache = FashionCache(size=1024)
+
 class FashionEcommerce(WebsiteSale):
     
     def _validate_product_id(self, product_id):
@@ -28,44 +45,225 @@ class FashionEcommerce(WebsiteSale):
         except (ValueError, TypeError):
             raise ValidationError("Quantity must be a valid number")
     
+    def _get_cart_order(self):
+        """Return the current draft cart, locked for the rest of the transaction"""
+        order = request.website.sale_get_order(force_create=True)
+        if order.state != 'draft':
+            request.session['sale_order_id'] = None
+            order = request.website.sale_get_order(force_create=True)
+        # Always lock the order row first, before its lines and holds, so that
+        # concurrent updates of one cart queue up instead of deadlocking
+        request.env.cr.execute("SELECT id FROM sale_order WHERE id = %s FOR NO KEY UPDATE", [order.id])
+        return order
+    
+    def _mark_website_order(self, order):
+        """Flag the order as a B2C website order, writing only the flags that change"""
+        vals = {}
+        if not order.website_order:
+            vals['website_order'] = True
+        if order.customer_type != 'b2c':
+            vals['customer_type'] = 'b2c'
+        if vals:
+            order.write(vals)
+    
+    def _cart_mutate(self, order, product, add_qty=0, set_qty=0, **kw):
+        """Check availability, update the cart and hold the new quantity.
+
+        Returns the values of ``_cart_update``, or a dict with an ``error`` key
+        and the ``available_qty`` when the stock not held by other carts is short.
+        """
+        Hold = request.env['fashion.stock.hold'].sudo()
+        lines = order.order_line.filtered(lambda line: line.product_id == product)
+        in_cart = sum(lines.mapped('product_uom_qty'))
+        requested_qty = set_qty if set_qty else in_cart + add_qty
+        if product.type == 'product':
+            available_qty = Hold._get_available_to_sell(product, exclude_orders=order)[product]
+            if available_qty < requested_qty:
+                return {'error': 'stock_unavailable', 'available_qty': max(available_qty - in_cart, 0.0)}
+        
+        values = order._cart_update(product_id=product.id, add_qty=add_qty, set_qty=set_qty, **kw)
+        self._mark_website_order(order)
+        
+        # Hold the cart quantity for a while so concurrent carts cannot oversell it
+        if product.type == 'product':
+            lines = order.order_line.filtered(lambda line: line.product_id == product)
+            Hold._hold(order, product, sum(lines.mapped('product_uom_qty')))
+        return values
+    
+    def _add_cart_timing(self, response, started, attempts):
+        """Report the time spent and the transaction attempts of a cart request"""
+        response.headers['Server-Timing'] = f"cart;dur={(time.perf_counter() - started) * 1000:.1f}"
+        response.headers['X-Cart-Attempts'] = str(attempts)
+        return response
+    
     @http.route(['/shop/cart/update'], type='http', auth="public", methods=["POST"], website=True, csrf=False)
-    def cart_update(self, product_id, add_qty=1, set_qty=0, **kw):
+    def cart_update(self, product_id, add_qty=1, set_qty=0, product_custom_attribute_values=None,
+                    no_variant_attribute_value_ids=None, express=False, **kw):
         """Enhanced cart update with stock validation"""
+        started = time.perf_counter()
+        # Serialization failures replay the whole request, count the attempts
+        attempts = request._fashion_cart_attempts = getattr(request, '_fashion_cart_attempts', 0) + 1
+        if attempts > 1:
+            _logger.info(f"Cart update retried, attempt {attempts}")
         try:
             # Validate inputs
             product_id = self._validate_product_id(product_id)
             add_qty = self._validate_quantity(add_qty)
+            set_qty = self._validate_quantity(set_qty) if set_qty else 0
             
             product = request.env['product.product'].browse(product_id)
             if not product.exists():
                 raise ValidationError("Product not found")
             
-            # Check stock availability
-            if product.qty_available < add_qty:
-                return request.render('fashion_ecommerce.stock_unavailable', {
+            if product_custom_attribute_values:
+                product_custom_attribute_values = json_scriptsafe.loads(product_custom_attribute_values)
+            if no_variant_attribute_value_ids:
+                no_variant_attribute_value_ids = [
+                    int(ptav_data['value']) for ptav_data in json_scriptsafe.loads(no_variant_attribute_value_ids)
+                ]
+            
+            order = self._get_cart_order()
+            result = self._cart_mutate(
+                order, product, add_qty, set_qty,
+                product_custom_attribute_values=product_custom_attribute_values,
+                no_variant_attribute_value_ids=no_variant_attribute_value_ids,
+                **kw
+            )
+            if result.get('error'):
+                response = request.render('fashion_ecommerce.stock_unavailable', {
                     'product': product,
-                    'available_qty': product.qty_available,
+                    'available_qty': result['available_qty'],
                     'requested_qty': add_qty
                 })
-            
-            # Call parent method
-            result = super(FashionEcommerce, self).cart_update(product_id, add_qty, set_qty, **kw)
-            
-            # Mark as website order
-            order = request.website.sale_get_order()
-            if order:
-                order.website_order = True
-                order.customer_type = 'b2c'
-                
-            return result
+            else:
+                request.session['website_sale_cart_quantity'] = order.cart_quantity
+                response = request.redirect("/shop/checkout?express=1" if express else "/shop/cart")
+            return self._add_cart_timing(response, started, attempts)
             
         except ValidationError as e:
             _logger.warning(f"Cart update validation error: {str(e)}")
             return request.render('fashion_ecommerce.validation_error', {'error': str(e)})
+        except OperationalError as e:
+            if e.pgcode in PG_CONCURRENCY_ERRORS_TO_RETRY:
+                # Let the request be retried in a fresh transaction
+                raise
+            _logger.error(f"Database error in cart update: {str(e)}")
+            return request.render('fashion_ecommerce.general_error', {'error': 'An unexpected error occurred'})
         except Exception as e:
             _logger.error(f"Unexpected error in cart update: {str(e)}")
             return request.render('fashion_ecommerce.general_error', {'error': 'An unexpected error occurred'})
     
+    def _parse_bulk_cart_items(self, items=None, csv_text=None):
+        """Return input lines as dicts with a reference, a quantity and an error, if any.
+
+        ``items`` is a list of ``{'product_id', 'qty'}`` dicts or ``[product_id, qty]``
+        pairs; ``csv_text`` holds one ``SKU,qty`` pair per line as pasted in the B2B portal.
+        """
+        lines = []
+        if items:
+            for item in items:
+                product_id, qty = (item.get('product_id'), item.get('qty', 1)) if isinstance(item, dict) else (list(item) + [1])[:2]
+                lines.append({'ref': product_id, 'product_id': product_id, 'qty': qty})
+        if csv_text:
+            for row in csv.reader(io.StringIO(csv_text)):
+                if not row or not row[0].strip():
+                    continue
+                lines.append({'ref': row[0].strip(), 'sku': row[0].strip(), 'qty': row[1].strip() if len(row) > 1 else 1})
+        
+        for line in lines[:BULK_CART_MAX_LINES]:
+            try:
+                line['qty'] = self._validate_quantity(line['qty'])
+                if not line['qty']:
+                    raise ValidationError("Quantity must be positive")
+                if 'product_id' in line:
+                    line['product_id'] = self._validate_product_id(line['product_id'])
+            except ValidationError as e:
+                line['error'] = str(e)
+        for line in lines[BULK_CART_MAX_LINES:]:
+            line['error'] = f"Too many lines, at most {BULK_CART_MAX_LINES} are accepted"
+        return lines
+    
+    @http.route(['/shop/cart/bulk_add'], type='json', auth="public", website=True)
+    def cart_bulk_add(self, items=None, csv_text=None, **kw):
+        """Add many products to the cart in one transaction with one batched stock check"""
+        started = time.perf_counter()
+        try:
+            lines = self._parse_bulk_cart_items(items, csv_text)
+            valid = [line for line in lines if 'error' not in line]
+            
+            # Resolve ids and SKUs with one query each
+            Product = request.env['product.product']
+            products_by_id = {product.id: product for product in Product.browse([
+                line['product_id'] for line in valid if 'product_id' in line
+            ]).exists().filtered('sale_ok')}
+            skus = [line['sku'] for line in valid if 'sku' in line]
+            products_by_sku = {
+                product.default_code: product
+                for product in Product.search([('default_code', 'in', skus), ('sale_ok', '=', True)])
+            } if skus else {}
+            
+            demand = {}
+            for line in valid:
+                product = products_by_id.get(line['product_id']) if 'product_id' in line else products_by_sku.get(line['sku'])
+                if not product:
+                    line['error'] = "Product not found"
+                    continue
+                line['product'] = product
+                demand[product] = demand.get(product, 0.0) + line['qty']
+            
+            order = self._get_cart_order()
+            stored = Product.concat(*[product for product in demand if product.type == 'product'])
+            available = request.env['fashion.stock.hold'].sudo()._get_available_to_sell(stored, exclude_orders=order)
+            in_cart = {}
+            for order_line in order.order_line:
+                in_cart[order_line.product_id] = in_cart.get(order_line.product_id, 0.0) + order_line.product_uom_qty
+            
+            accepted = {}
+            for product, qty in demand.items():
+                if product in available and available[product] < in_cart.get(product, 0.0) + qty:
+                    continue
+                order._cart_update(product_id=product.id, add_qty=qty)
+                accepted[product] = qty
+            
+            if accepted:
+                self._mark_website_order(order)
+                cart_quantities = {}
+                for order_line in order.order_line:
+                    if order_line.product_id in accepted and order_line.product_id.type == 'product':
+                        cart_quantities[order_line.product_id] = cart_quantities.get(order_line.product_id, 0.0) + order_line.product_uom_qty
+                request.env['fashion.stock.hold'].sudo()._hold_many(order, cart_quantities)
+                request.session['website_sale_cart_quantity'] = order.cart_quantity
+            
+            results = []
+            for line in lines:
+                product = line.get('product')
+                result = {'ref': line['ref'], 'qty': line['qty']}
+                if 'error' in line:
+                    result.update(status='error', message=line['error'])
+                elif product in accepted:
+                    result.update(status='added', product_id=product.id)
+                else:
+                    result.update(
+                        status='unavailable', product_id=product.id,
+                        available_qty=max(available[product] - in_cart.get(product, 0.0), 0.0),
+                    )
+                results.append(result)
+            
+            return {
+                'lines': results,
+                'cart_quantity': order.cart_quantity,
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            }
+            
+        except OperationalError as e:
+            if e.pgcode in PG_CONCURRENCY_ERRORS_TO_RETRY:
+                raise
+            _logger.error(f"Database error in bulk cart update: {str(e)}")
+            return {'error': 'An unexpected error occurred'}
+        except Exception as e:
+            _logger.error(f"Unexpected error in bulk cart update: {str(e)}")
+            return {'error': 'An unexpected error occurred'}
+    
     def _get_delivery_methods(self):
         """Get delivery methods from system parameters"""
         return [
@@ -120,18 +318,9 @@ class FashionEcommerce(WebsiteSale):
             if post.get('customer_type') in ['b2c', 'b2b']:
                 order.customer_type = post.get('customer_type')
             
-            # Confirm the order
+            # Confirm the order, B2C website orders get invoiced by the invoice queue
             order.action_confirm()
             
-            # Create invoice for B2C orders
-            if order.customer_type == 'b2c':
-                try:
-                    invoices = order._create_invoices()
-                    if invoices:
-                        invoices.action_post()
-                except Exception as invoice_error:
-                    _logger.warning(f"Invoice creation failed: {str(invoice_error)}")
-            
             return request.render('fashion_ecommerce.order_confirmation', {
                 'order': order
             })
@@ -161,25 +350,40 @@ class FashionEcommerce(WebsiteSale):
             raise ValidationError("Invalid tracking number format")
         return tracking_number.strip()
     
+    def _render_tracking_status(self, tracking_number):
+        """Return the rendered tracking fragment, or None when no order matches"""
+        key = (request.env.cr.dbname, request.env.uid, request.website.id, request.env.lang, tracking_number)
+        html = _tracking_cache.get(key, default=_NOT_CACHED)
+        if html is _NOT_CACHED:
+            # Served from the unique partial index on tracking_number
+            order = request.env['sale.order'].search([
+                ('tracking_number', '=', tracking_number),
+                ('website_order', '=', True)  # Only website orders can be tracked publicly
+            ], limit=1)
+            html = request.env['ir.qweb']._render('fashion_ecommerce.order_tracking_status', {
+                'order': order,
+                'tracking_number': tracking_number,
+            }) if order else None
+            _tracking_cache.set(key, html)
+        return html
+    
     @http.route(['/shop/track/<string:tracking_number>'], type='http', auth="public", website=True)
     def track_order(self, tracking_number, **kw):
         """Order tracking page"""
         try:
             tracking_number = self._validate_tracking_number(tracking_number)
             
-            # Use regular search instead of sudo for security
-            order = request.env['sale.order'].search([
-                ('tracking_number', '=', tracking_number),
-                ('website_order', '=', True)  # Only website orders can be tracked publicly
-            ], limit=1)
+            # Use regular search instead of sudo for security; results are cached
+            # per user for a short while so refreshes do not hit the database
+            tracking_html = self._render_tracking_status(tracking_number)
             
-            if not order:
+            if tracking_html is None:
                 return request.render('fashion_ecommerce.tracking_not_found', {
                     'tracking_number': tracking_number
                 })
             
             return request.render('fashion_ecommerce.order_tracking', {
-                'order': order,
+                'tracking_html': tracking_html,
                 'tracking_number': tracking_number
             })
             
@@ -195,25 +399,56 @@ class FashionEcommerce(WebsiteSale):
                 'tracking_number': tracking_number
             })
     
+    def _render_b2b_catalog(self, partner, audience, brand, season, page):
+        """Return the rendered catalog fragment of partner, cached until prices, products or stock change"""
+        cr = request.env.cr
+        key = (cr.dbname, partner.commercial_partner_id.id, request.website.id, request.env.lang,
+               audience, brand, season, page)
+        version = tuple(get_version(cr, name) for name in ('catalog', 'b2b_pricing', 'stock'))
+        html = _b2b_catalog_cache.get(key, version)
+        if html is None:
+            catalog = request.env['product.template']._get_fashion_b2b_catalog(
+                partner, audience=audience, brand=brand, season=season, page=page)
+            html = _b2b_catalog_cache.set(key, request.env['ir.qweb']._render(
+                'fashion_ecommerce.b2b_catalog', {
+                    'catalog': catalog,
+                    'page_url': lambda number: '/shop/b2b?' + urlencode({
+                        key: value for key, value in {
+                            'audience': audience, 'brand': brand, 'season': season, 'page': number,
+                        }.items() if value
+                    }),
+                }), version)
+        return html
+    
     @http.route(['/shop/b2b'], type='http', auth="user", website=True)
-    def b2b_portal(self, **kw):
+    def b2b_portal(self, page=1, audience=None, brand=None, season=None, **kw):
         """B2B customer portal"""
         partner = request.env.user.partner_id
         
+        try:
+            page = max(1, int(page))
+        except (ValueError, TypeError):
+            page = 1
+        Product = request.env['product.template']
+        if audience not in dict(Product._fields['target_audience'].selection):
+            audience = None
+        if season not in dict(Product._fields['season'].selection):
+            season = None
+        
         # Get B2B orders
         orders = request.env['sale.order'].search([
             ('partner_id', '=', partner.id),
             ('customer_type', '=', 'b2b')
         ], order='date_order desc', limit=10)
         
-        # Get B2B products with special pricing
-        products = request.env['product.template'].search([
-            ('b2b_price', '>', 0),
-            ('target_audience', '!=', False)
-        ])
-        
         return request.render('fashion_ecommerce.b2b_portal', {
             'partner': partner,
             'orders': orders,
-            'products': products
+            'catalog_html': self._render_b2b_catalog(partner, audience, brand or None, season, page),
+            'audience': audience,
+            'brand': brand,
+            'season': season,
+            'brands': Product._get_fashion_filter_options()['brand'],
+            'audiences': Product._fields['target_audience'].selection,
+            'seasons': Product._fields['season'].selection,
         })
@@ -0,0 +1,52 @@
+from odoo import http, fields
+from odoo.http import request
+from odoo.exceptions import AccessError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class FashionInventory(http.Controller):
+    
+    def _get_low_stock_filters(self, audience=None, brand=None, warehouse_id=None):
+        """Validate the low-stock filters shared by the JSON and CSV routes"""
+        if not request.env.user.has_group('stock.group_stock_user'):
+            raise AccessError("You are not allowed to access inventory reports")
+        
+        filters = {}
+        if audience in ('men', 'women', 'children'):
+            filters['audience'] = audience
+        if brand:
+            filters['brand'] = brand
+        if warehouse_id:
+            try:
+                filters['warehouse_id'] = int(warehouse_id)
+            except (ValueError, TypeError):
+                pass
+        return filters
+    
+    @http.route('/fashion/inventory/low_stock', type='json', auth="user")
+    def low_stock(self, limit=100, cursor=None, audience=None, brand=None, warehouse_id=None):
+        """Paginated low-stock rows for purchasing tools"""
+        try:
+            filters = self._get_low_stock_filters(audience, brand, warehouse_id)
+            limit = min(max(1, int(limit)), 1000)
+            rows, next_cursor = request.env['stock.quant']._get_fashion_low_stock_rows(
+                limit=limit, cursor=cursor, **filters)
+            return {'rows': rows, 'next_cursor': next_cursor}
+            
+        except AccessError as e:
+            return {'error': str(e)}
+        except (ValueError, TypeError) as e:
+            _logger.warning(f"Low stock API error: {str(e)}")
+            return {'error': 'Invalid parameters'}
+    
+    @http.route('/fashion/inventory/low_stock.csv', type='http', auth="user")
+    def low_stock_csv(self, audience=None, brand=None, warehouse_id=None, **kw):
+        """Stream the full low-stock report as CSV"""
+        filters = self._get_low_stock_filters(audience, brand, warehouse_id)
+        chunks = request.env['stock.quant']._iter_fashion_low_stock_csv(**filters)
+        filename = f"low_stock_{fields.Date.to_string(fields.Date.context_today(request.env.user))}.csv"
+        return request.make_response(chunks, headers=[
+            ('Content-Type', 'text/csv; charset=utf-8'),
+            ('Content-Disposition', f'attachment; filename="{filename}"'),
+        ])
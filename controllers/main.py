@@ -1,7 +1,7 @@
 from odoo import http
 from odoo.http import request
-from odoo.addons.website_sale.controllers.main import WebsiteSale
-from odoo.exceptions import ValidationError
+from odoo.addons.fashion_ecommerce.models.product import FASHION_SORT_ORDERS
+from urllib.parse import urlencode
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -10,11 +10,7 @@ class FashionWebsite(http.Controller):
     
     def _get_base_product_domain(self):
         """Get base domain for fashion products"""
-        return [
-            ('website_published', '=', True), 
-            ('sale_ok', '=', True),
-            ('target_audience', '!=', False)
-        ]
+        return request.env['product.template']._get_fashion_base_domain()
     
     def _get_category_info(self, audience):
         """Get category information for audience"""
@@ -34,6 +30,10 @@ class FashionWebsite(http.Controller):
         }
         return category_info.get(audience, {'title': 'Fashion', 'description': 'Quality fashion collection'})
 
+    def _get_sort_order(self, order):
+        """Validate a listing sort mode, relevance only applies to text searches"""
+        return order if order in FASHION_SORT_ORDERS and order != 'relevance' else 'name'
+
     @http.route('/', type='http', auth="public", website=True)
     def homepage(self, **kw):
         try:
@@ -44,22 +44,23 @@ class FashionWebsite(http.Controller):
             _logger.error(f"Homepage error: {str(e)}")
             return request.render("fashion_ecommerce.homepage", {'products': []})
 
-    def _get_audience_products(self, audience, page=1, limit=20):
+    def _get_audience_products(self, audience, page=1, limit=20, cursor=None, order='name'):
         """Get products for specific audience with pagination"""
         domain = self._get_base_product_domain()
         domain.append(('target_audience', '=', audience))
         
-        offset = (page - 1) * limit
-        products = request.env['product.template'].search(domain, limit=limit, offset=offset, order='name')
-        total_count = request.env['product.template'].search_count(domain)
+        Product = request.env['product.template']
+        result = Product._fashion_search_page(domain, limit=limit, page=page, cursor=cursor, order=order)
+        total_count = Product._fashion_count(domain)
         
-        return products, total_count
+        return result['products'], total_count, result['next_cursor']
     
     @http.route('/mens-clothing', type='http', auth="public", website=True)
-    def mens_clothing(self, page=1, **kw):
+    def mens_clothing(self, page=1, cursor=None, order='name', **kw):
         try:
             page = max(1, int(page))
-            products, total_count = self._get_audience_products('men', page)
+            order = self._get_sort_order(order)
+            products, total_count, next_cursor = self._get_audience_products('men', page, cursor=cursor, order=order)
             category_info = self._get_category_info('men')
             
             return request.render("fashion_ecommerce.mens_clothing_page", {
@@ -67,7 +68,9 @@ class FashionWebsite(http.Controller):
                 'category_title': category_info['title'],
                 'category_description': category_info['description'],
                 'current_page': page,
-                'total_pages': (total_count + 19) // 20
+                'total_pages': (total_count + 19) // 20,
+                'next_cursor': next_cursor,
+                'order': order
             })
         except (ValueError, TypeError):
             return request.redirect('/mens-clothing')
@@ -76,10 +79,11 @@ class FashionWebsite(http.Controller):
             return request.redirect('/')
 
     @http.route('/womens-clothing', type='http', auth="public", website=True)
-    def womens_clothing(self, page=1, **kw):
+    def womens_clothing(self, page=1, cursor=None, order='name', **kw):
         try:
             page = max(1, int(page))
-            products, total_count = self._get_audience_products('women', page)
+            order = self._get_sort_order(order)
+            products, total_count, next_cursor = self._get_audience_products('women', page, cursor=cursor, order=order)
             category_info = self._get_category_info('women')
             
             return request.render("fashion_ecommerce.womens_clothing_page", {
@@ -87,7 +91,9 @@ class FashionWebsite(http.Controller):
                 'category_title': category_info['title'],
                 'category_description': category_info['description'],
                 'current_page': page,
-                'total_pages': (total_count + 19) // 20
+                'total_pages': (total_count + 19) // 20,
+                'next_cursor': next_cursor,
+                'order': order
             })
         except (ValueError, TypeError):
             return request.redirect('/womens-clothing')
@@ -96,10 +102,11 @@ class FashionWebsite(http.Controller):
             return request.redirect('/')
 
     @http.route('/childrens-clothing', type='http', auth="public", website=True)
-    def childrens_clothing(self, page=1, **kw):
+    def childrens_clothing(self, page=1, cursor=None, order='name', **kw):
         try:
             page = max(1, int(page))
-            products, total_count = self._get_audience_products('children', page)
+            order = self._get_sort_order(order)
+            products, total_count, next_cursor = self._get_audience_products('children', page, cursor=cursor, order=order)
             category_info = self._get_category_info('children')
             
             return request.render("fashion_ecommerce.childrens_clothing_page", {
@@ -107,7 +114,9 @@ class FashionWebsite(http.Controller):
                 'category_title': category_info['title'],
                 'category_description': category_info['description'],
                 'current_page': page,
-                'total_pages': (total_count + 19) // 20
+                'total_pages': (total_count + 19) // 20,
+                'next_cursor': next_cursor,
+                'order': order
             })
         except (ValueError, TypeError):
             return request.redirect('/childrens-clothing')
@@ -116,11 +125,11 @@ class FashionWebsite(http.Controller):
             return request.redirect('/')
 
     @http.route('/shop', type='http', auth="public", website=True)
-    def shop(self, target_audience=None, brand=None, color=None, size=None, page=1, **kw):
+    def shop(self, target_audience=None, brand=None, color=None, size=None, page=1, cursor=None, order='name', **kw):
         try:
             page = max(1, int(page))
             limit = 20
-            offset = (page - 1) * limit
+            order = self._get_sort_order(order)
             
             # Build domain with filters
             domain = self._get_base_product_domain()
@@ -135,15 +144,16 @@ class FashionWebsite(http.Controller):
             if size and size in ['xs', 's', 'm', 'l', 'xl', 'xxl', 'xxxl']:
                 domain.append(('clothing_size', '=', size))
                 
-            products = request.env['product.template'].search(domain, limit=limit, offset=offset, order='name')
-            total_count = request.env['product.template'].search_count(domain)
+            Product = request.env['product.template']
+            result = Product._fashion_search_page(domain, limit=limit, page=page, cursor=cursor, order=order)
+            products = result['products']
             
-            # Get filter options
-            all_products = request.env['product.template'].search(self._get_base_product_domain())
-            brands = list(set(all_products.mapped('brand')))
-            colors = list(set(all_products.mapped('color')))
+            # Get cached filter options and drill-down counts for the current filters
+            filter_options = Product._get_fashion_filter_options()
+            facets = Product._get_fashion_facets(domain) if domain != self._get_base_product_domain() else filter_options
+            total_count = facets['total']
             
-            order = request.website.sale_get_order()
+            cart = request.website.sale_get_order()
             
             return request.render("fashion_ecommerce.shop_page", {
                 'products': products,
@@ -151,11 +161,24 @@ class FashionWebsite(http.Controller):
                 'brand': brand,
                 'color': color,
                 'size': size,
-                'brands': sorted([b for b in brands if b]),
-                'colors': sorted([c for c in colors if c]),
+                'brands': [b['value'] for b in filter_options['brand']],
+                'colors': [c['value'] for c in filter_options['color']],
+                'facets': facets,
+                'order': order,
                 'current_page': page,
                 'total_pages': (total_count + limit - 1) // limit,
-                'website_sale_current_pl': order
+                'next_url': result['next_cursor'] and '/shop?%s' % urlencode({
+                    key: value for key, value in {
+                        'target_audience': target_audience,
+                        'brand': brand,
+                        'color': color,
+                        'size': size,
+                        'order': order if order != 'name' else None,
+                        'page': page + 1,
+                        'cursor': result['next_cursor'],
+                    }.items() if value
+                }),
+                'website_sale_current_pl': cart
             })
             
         except (ValueError, TypeError):
@@ -163,30 +186,3 @@ class FashionWebsite(http.Controller):
         except Exception as e:
             _logger.error(f"Shop page error: {str(e)}")
             return request.redirect('/')
-
-class FashionWebsiteSale(WebsiteSale):
-    
-    @http.route(['/shop/cart/update'], type='http', auth="public", methods=["POST"], website=True, csrf=False)
-    def cart_update(self, product_id, add_qty=1, set_qty=0, **kw):
-        """Override to handle fashion-specific cart updates"""
-        try:
-            # Validate inputs
-            product_id = int(product_id)
-            add_qty = float(add_qty)
-            
-            if product_id <= 0 or add_qty < 0:
-                raise ValidationError("Invalid product or quantity")
-                
-            result = super(FashionWebsiteSale, self).cart_update(product_id, add_qty, set_qty, **kw)
-            
-            # Redirect to cart page after adding item
-            if isinstance(result, dict) and result.get('cart_quantity'):
-                return request.redirect('/shop/cart')
-            return result
-            
-        except (ValueError, TypeError, ValidationError) as e:
-            _logger.warning(f"Cart update error: {str(e)}")
-            return request.redirect('/shop')
-        except Exception as e:
-            _logger.error(f"Unexpected cart update error: {str(e)}")
-            return request.redirect('/shop')
@@ -1,6 +1,8 @@
 from odoo import http
 from odoo.http import request
 from odoo.exceptions import ValidationError
+from odoo.addons.fashion_ecommerce.models.product import FASHION_SORT_ORDERS
+from urllib.parse import urlencode
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -9,29 +11,16 @@ class FashionSearch(http.Controller):
     
     @http.route('/shop/search', type='http', auth="public", website=True)
     def product_search(self, search=None, category=None, min_price=None, max_price=None, 
-                      brand=None, color=None, size=None, rating=None, page=1, **kw):
+                      brand=None, color=None, size=None, rating=None, page=1, cursor=None, order=None, **kw):
         """Advanced product search with multiple filters"""
         try:
             page = max(1, int(page))
             limit = 20
-            offset = (page - 1) * limit
             
             # Build search domain
-            domain = [
-                ('website_published', '=', True),
-                ('sale_ok', '=', True),
-                ('target_audience', '!=', False)
-            ]
-            
-            # Text search
-            if search:
-                domain.extend([
-                    '|', '|', '|',
-                    ('name', 'ilike', search),
-                    ('brand', 'ilike', search),
-                    ('description', 'ilike', search),
-                    ('description_sale', 'ilike', search)
-                ])
+            Product = request.env['product.template']
+            base_domain = Product._get_fashion_base_domain()
+            domain = list(base_domain)
             
             # Category filter
             if category and category in ['men', 'women', 'children']:
@@ -62,26 +51,31 @@ class FashionSearch(http.Controller):
             if size and size in ['xs', 's', 'm', 'l', 'xl', 'xxl', 'xxxl']:
                 domain.append(('clothing_size', '=', size))
             
-            # Get products
-            products = request.env['product.template'].search(domain, limit=limit, offset=offset, order='name')
-            total_count = request.env['product.template'].search_count(domain)
-            
-            # Get filter options for sidebar
-            all_products = request.env['product.template'].search([
-                ('website_published', '=', True),
-                ('sale_ok', '=', True),
-                ('target_audience', '!=', False)
-            ])
-            
-            brands = sorted(list(set(all_products.mapped('brand'))))
-            colors = sorted(list(set(all_products.mapped('color'))))
-            
-            # Price range
-            prices = all_products.mapped('list_price')
-            price_range = {
-                'min': min(prices) if prices else 0,
-                'max': max(prices) if prices else 1000
-            }
+            # Rating filter, "N stars & up"
+            if rating:
+                try:
+                    min_rating = int(rating)
+                    if 1 <= min_rating <= 5:
+                        domain.append(('average_rating', '>=', min_rating))
+                except ValueError:
+                    pass
+            
+            # Sort by relevance by default when searching for text
+            if order not in FASHION_SORT_ORDERS:
+                order = 'relevance' if search else 'name'
+            
+            # Get products, the text search runs on the full-text index or falls back to ilike
+            result = Product._fashion_search_page(domain, limit=limit, page=page, cursor=cursor,
+                                                  search=search, order=order)
+            products = result['products']
+            
+            # Get cached filter options for sidebar and drill-down counts for the current filters
+            filter_options = Product._get_fashion_filter_options()
+            if domain != base_domain or search:
+                facets = Product._get_fashion_facets(domain, search)
+            else:
+                facets = filter_options
+            total_count = facets['total']
             
             values = {
                 'products': products,
@@ -93,12 +87,29 @@ class FashionSearch(http.Controller):
                 'color': color,
                 'size': size,
                 'rating': rating,
-                'brands': [b for b in brands if b],
-                'colors': [c for c in colors if c],
-                'price_range': price_range,
+                'order': order,
+                'brands': [b['value'] for b in filter_options['brand']],
+                'colors': [c['value'] for c in filter_options['color']],
+                'price_range': filter_options['price_range'],
+                'facets': facets,
                 'current_page': page,
                 'total_pages': (total_count + limit - 1) // limit,
-                'total_products': total_count
+                'total_products': total_count,
+                'next_url': result['next_cursor'] and '/shop/search?%s' % urlencode({
+                    key: value for key, value in {
+                        'search': search,
+                        'category': category,
+                        'min_price': min_price,
+                        'max_price': max_price,
+                        'brand': brand,
+                        'color': color,
+                        'size': size,
+                        'rating': rating,
+                        'order': order,
+                        'page': page + 1,
+                        'cursor': result['next_cursor'],
+                    }.items() if value
+                })
             }
             
             return request.render('fashion_ecommerce.search_results', values)
@@ -114,27 +125,9 @@ class FashionSearch(http.Controller):
             if not term or len(term) < 2:
                 return []
             
-            # Search in product names and brands
-            products = request.env['product.template'].search([
-                ('website_published', '=', True),
-                ('sale_ok', '=', True),
-                ('target_audience', '!=', False),
-                '|',
-                ('name', 'ilike', term),
-                ('brand', 'ilike', term)
-            ], limit=10)
-            
-            suggestions = []
-            for product in products:
-                suggestions.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'brand': product.brand or '',
-                    'price': product.list_price,
-                    'image': f'/web/image/product.template/{product.id}/image_256'
-                })
-            
-            return suggestions
+            # Served from the trigram index and the per-worker suggestion cache
+            return request.env['product.template']._get_fashion_suggestions(
+                term, website_id=request.website.id, pricelist=request.website.pricelist_id)
             
         except Exception as e:
             _logger.error(f"Autocomplete error: {str(e)}")
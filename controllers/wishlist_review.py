@@ -5,20 +5,28 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+WISHLIST_PAGE_SIZE = 24
+
 class FashionWishlistController(http.Controller):
     
     @http.route('/shop/wishlist', type='http', auth="user", website=True)
-    def wishlist_page(self, **kw):
-        """Display user's wishlist"""
+    def wishlist_page(self, page=1, **kw):
+        """Display one page of user's wishlist"""
         try:
+            try:
+                page = max(1, int(page))
+            except (TypeError, ValueError):
+                page = 1
             partner = request.env.user.partner_id
-            wishlist_items = request.env['fashion.wishlist'].search([
-                ('partner_id', '=', partner.id)
-            ])
+            wishlist = request.env['fashion.wishlist']._get_wishlist_page(partner.id, page=page, limit=WISHLIST_PAGE_SIZE)
+            if not wishlist['items'] and page > 1:
+                return request.redirect('/shop/wishlist')
             
             return request.render('fashion_ecommerce.wishlist_page', {
-                'wishlist_items': wishlist_items,
-                'partner': partner
+                'wishlist': wishlist,
+                'wishlist_items': wishlist['items'],
+                'partner': partner,
+                'page_url': lambda target: f"/shop/wishlist?page={target}",
             })
             
         except Exception as e:
@@ -42,6 +50,19 @@ class FashionWishlistController(http.Controller):
             _logger.error(f"Unexpected wishlist error: {str(e)}")
             return {'error': 'An error occurred'}
     
+    @http.route('/shop/wishlist/status', type='json', auth="public", website=True)
+    def wishlist_status(self, product_ids=None):
+        """Wishlisted subset of the products shown on a page, and the wishlist size"""
+        if request.env.user._is_public():
+            return {'wishlisted': [], 'count': 0}
+        try:
+            product_ids = [int(product_id) for product_id in (product_ids or [])[:500]]
+            return request.env['fashion.wishlist'].get_wishlist_status(product_ids)
+            
+        except (ValueError, TypeError) as e:
+            _logger.warning(f"Wishlist status error: {str(e)}")
+            return {'error': 'Invalid product ids'}
+    
     @http.route('/shop/wishlist/remove/<int:item_id>', type='http', auth="user", website=True, csrf=False)
     def remove_from_wishlist(self, item_id, **kw):
         """Remove item from wishlist"""
@@ -1,5 +1,12 @@
 from . import product
+from . import product_autocomplete
+from . import product_forecast
+from . import b2b_pricing
 from . import sale_order
+from . import invoice_queue
+from . import tracking_import
 from . import inventory_management
+from . import stock_hold
 from . import wishlist
+from . import wishlist_notification
 from . import product_review
\ No newline at end of file
@@ -0,0 +1,183 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from ..tools.cache import FashionCache, bump_version_on_commit, ensure_version_counter, get_version
+
+# Tier tables per commercial partner, stamped with the b2b_pricing version
+_tier_cache = FashionCache(size=256)
+
+
+class FashionB2BPriceTier(models.Model):
+    _name = 'fashion.b2b.price.tier'
+    _description = 'Fashion B2B Price Tier'
+    _rec_name = 'product_id'
+    _order = 'product_id, partner_id, min_qty'
+
+    product_id = fields.Many2one('product.template', string='Product', required=True, ondelete='cascade')
+    partner_id = fields.Many2one('res.partner', string='Customer', ondelete='cascade',
+                                 help="Leave empty to apply the tier to all B2B customers")
+    min_qty = fields.Float(string='Minimum Quantity', default=1.0, required=True)
+    price = fields.Float(string='Unit Price', required=True)
+    from_product = fields.Boolean(string='From Product', readonly=True,
+                                  help="Generated from the B2B price and minimum quantity of the product")
+
+    def init(self):
+        ensure_version_counter(self.env.cr, 'b2b_pricing')
+        create_index(self.env.cr, 'fashion_b2b_price_tier_lookup_idx', self._table,
+                     ['partner_id', 'product_id', 'min_qty'])
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        tiers = super().create(vals_list)
+        bump_version_on_commit(self.env.cr, 'b2b_pricing')
+        return tiers
+
+    def write(self, vals):
+        result = super().write(vals)
+        bump_version_on_commit(self.env.cr, 'b2b_pricing')
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        bump_version_on_commit(self.env.cr, 'b2b_pricing')
+        return result
+
+    @api.model
+    def _sync_product_tiers(self, template_ids=None):
+        """Regenerate the tiers derived from b2b_price/b2b_min_qty, for all products or template_ids"""
+        cr = self.env.cr
+        self.env['product.template'].flush_model(['b2b_price', 'b2b_min_qty'])
+        tier_filter = "AND product_id = ANY(%(ids)s)" if template_ids else ""
+        template_filter = "AND pt.id = ANY(%(ids)s)" if template_ids else ""
+        cr.execute(f"""
+            DELETE FROM fashion_b2b_price_tier
+            WHERE from_product {tier_filter}
+        """, {'ids': list(template_ids or [])})
+        cr.execute(f"""
+            INSERT INTO fashion_b2b_price_tier (product_id, min_qty, price, from_product,
+                                                create_uid, create_date, write_uid, write_date)
+            SELECT pt.id, GREATEST(COALESCE(pt.b2b_min_qty, 1), 0), pt.b2b_price, TRUE,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM product_template pt
+            WHERE pt.b2b_price > 0 {template_filter}
+        """, {'ids': list(template_ids or []), 'uid': self.env.uid})
+        self.invalidate_model()
+        bump_version_on_commit(cr, 'b2b_pricing')
+
+    @api.model
+    def _get_partner_tiers(self, partner):
+        """Return {template id: [(min qty, price), ...]} applicable to partner, best tiers first.
+
+        Tiers specific to the partner's company replace the generic tiers of a product.
+        """
+        partner_id = partner.commercial_partner_id.id if partner else None
+        key = (self.env.cr.dbname, partner_id)
+        version = get_version(self.env.cr, 'b2b_pricing')
+        tiers = _tier_cache.get(key, version)
+        if tiers is None:
+            self.flush_model()
+            self.env.cr.execute("""
+                SELECT DISTINCT ON (product_id, min_qty) product_id, min_qty, price
+                FROM fashion_b2b_price_tier tier
+                WHERE tier.partner_id = %(partner)s
+                OR (tier.partner_id IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM fashion_b2b_price_tier own
+                    WHERE own.partner_id = %(partner)s AND own.product_id = tier.product_id
+                ))
+                ORDER BY product_id, min_qty DESC, price
+            """, {'partner': partner_id})
+            tiers = {}
+            for product_id, min_qty, price in self.env.cr.fetchall():
+                tiers.setdefault(product_id, []).append((min_qty, price))
+            _tier_cache.set(key, tiers, version)
+        return tiers
+
+    @api.model
+    def _get_b2b_prices(self, partner, quantities):
+        """Return the unit prices of [(template id, qty)] in order, None where no tier applies"""
+        tiers = self._get_partner_tiers(partner)
+        return [
+            next((price for min_qty, price in tiers.get(template_id, ()) if qty >= min_qty), None)
+            for template_id, qty in quantities
+        ]
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    b2b_price_tier_ids = fields.One2many('fashion.b2b.price.tier', 'product_id', string='B2B Price Tiers')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        if any(vals.get('b2b_price') for vals in vals_list):
+            self.env['fashion.b2b.price.tier']._sync_product_tiers(products.ids)
+        return products
+
+    def write(self, vals):
+        result = super().write(vals)
+        if 'b2b_price' in vals or 'b2b_min_qty' in vals:
+            self.env['fashion.b2b.price.tier']._sync_product_tiers(self.ids)
+        return result
+
+    @api.model
+    def _get_fashion_b2b_catalog(self, partner, audience=None, brand=None, season=None, page=1, limit=24):
+        """Return one page of the B2B catalog of partner with prices and availability.
+
+        Products are those with a tier for the partner; the page, its total and
+        the stock figures come from a single query, the tiers from the cached
+        partner tier table.
+        """
+        tiers = self.env['fashion.b2b.price.tier']._get_partner_tiers(partner)
+        if not tiers:
+            return {'products': [], 'total': 0, 'page': 1, 'pages': 1}
+        domain = [('sale_ok', '=', True), ('target_audience', '!=', False)]
+        if audience:
+            domain.append(('target_audience', '=', audience))
+        if brand:
+            domain.append(('brand', '=', brand))
+        if season:
+            domain.append(('season', '=', season))
+
+        self.flush_model(['name', 'brand', 'target_audience', 'season', 'list_price',
+                          'fashion_qty_on_hand', 'stock_status'])
+        self.env['fashion.b2b.price.tier'].flush_model(['product_id', 'partner_id'])
+        from_clause, where_clause, params = self._get_fashion_query_parts(domain)
+        # Products with a tier for the partner's company or a generic one, i.e.
+        # those in tiers, as a semi-join instead of a list of every tiered id
+        where_clause = f"""{where_clause} AND EXISTS (
+            SELECT 1 FROM fashion_b2b_price_tier tier
+            WHERE tier.product_id = "product_template".id
+            AND (tier.partner_id = %s OR tier.partner_id IS NULL)
+        )"""
+        params = list(params) + [partner.commercial_partner_id.id]
+        lang = self.env.lang or 'en_US'
+        self.env.cr.execute(f"""
+            SELECT "product_template".id,
+                   COALESCE("product_template".name->>%s, "product_template".name->>'en_US') AS name,
+                   "product_template".brand,
+                   "product_template".target_audience,
+                   "product_template".season,
+                   "product_template".list_price,
+                   "product_template".fashion_qty_on_hand AS qty_available,
+                   "product_template".stock_status,
+                   COUNT(*) OVER () AS total
+            FROM {from_clause}
+            WHERE {where_clause}
+            ORDER BY name, "product_template".id
+            LIMIT %s OFFSET %s
+        """, [lang] + list(params) + [limit, (page - 1) * limit])
+        products = self.env.cr.dictfetchall()
+
+        total = products[0]['total'] if products else 0
+        for product in products:
+            # Tiers are cached best first; show them by increasing quantity
+            product['tiers'] = sorted(tiers[product['id']])
+            product['from_price'] = min(price for _min_qty, price in product['tiers'])
+            product['image_url'] = f"/web/image/product.template/{product['id']}/image_128"
+        return {
+            'products': products,
+            'total': total,
+            'page': page,
+            'pages': max(1, -(-total // limit)),
+        }
@@ -1,48 +1,119 @@
 from odoo import models, fields, api, tools
 from odoo.exceptions import UserError
+from collections import defaultdict
+import csv
+import io
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+CSV_LOW_STOCK_COLUMNS = ['product_id', 'name', 'brand', 'target_audience', 'current_stock', 'min_stock', 'shortage']
+
 class StockQuant(models.Model):
     _inherit = 'stock.quant'
     
     @api.model
     def _get_low_stock_products(self):
         """Get products with low stock levels using optimized query"""
-        # Use SQL query to avoid N+1 problem
-        query = """
-            SELECT pt.id, pt.name, pt.min_stock_level,
-                   COALESCE(SUM(sq.quantity), 0) as current_stock,
-                   (pt.min_stock_level - COALESCE(SUM(sq.quantity), 0)) as shortage
-            FROM product_template pt
-            LEFT JOIN product_product pp ON pp.product_tmpl_id = pt.id
-            LEFT JOIN stock_quant sq ON sq.product_id = pp.id 
-                AND sq.location_id IN (
-                    SELECT id FROM stock_location WHERE usage = 'internal'
-                )
-            WHERE pt.type = 'product' 
-                AND pt.target_audience IS NOT NULL
-                AND pt.min_stock_level > 0
-            GROUP BY pt.id, pt.name, pt.min_stock_level
-            HAVING COALESCE(SUM(sq.quantity), 0) <= pt.min_stock_level
-            ORDER BY shortage DESC
+        rows, _cursor = self._get_fashion_low_stock_rows()
+        products = self.env['product.template'].browse([row['product_id'] for row in rows])
+        
+        return [{
+            'product': product,
+            'current_stock': row['current_stock'],
+            'min_stock': row['min_stock'],
+            'shortage': row['shortage']
+        } for product, row in zip(products, rows)]
+    
+    @api.model
+    def _get_fashion_low_stock_rows(self, limit=None, cursor=None, audience=None, brand=None, warehouse_id=None):
+        """Return (rows, next_cursor) of low-stock products ordered by shortage, as plain dicts"""
+        location_filter = "AND sl.warehouse_id = %(warehouse_id)s" if warehouse_id else ""
+        conditions = []
+        if audience:
+            conditions.append("pt.target_audience = %(audience)s")
+        if brand:
+            conditions.append("pt.brand = %(brand)s")
+        seek = ""
+        params = {
+            'lang': self.env.lang or 'en_US',
+            'audience': audience,
+            'brand': brand,
+            'warehouse_id': warehouse_id,
+            'limit': limit + 1 if limit else None,
+        }
+        if cursor:
+            shortage, product_id = self.env['product.template']._decode_fashion_cursor(cursor)
+            seek = "WHERE (low.shortage, -low.product_id) < (%(shortage)s, -%(product_id)s)"
+            params.update(shortage=shortage, product_id=product_id)
+        
+        # Internal locations are joined rather than filtered through a subquery,
+        # and the (shortage desc, id) order doubles as the pagination key
+        query = f"""
+            SELECT * FROM (
+                SELECT pt.id as product_id,
+                       COALESCE(pt.name->>%(lang)s, pt.name->>'en_US') as name,
+                       pt.brand,
+                       pt.target_audience,
+                       pt.min_stock_level::float as min_stock,
+                       -- Quant quantities are numeric; floats keep rows and cursors JSON-friendly
+                       COALESCE(SUM(sq.quantity), 0)::float as current_stock,
+                       (pt.min_stock_level - COALESCE(SUM(sq.quantity), 0))::float as shortage
+                FROM product_template pt
+                LEFT JOIN product_product pp ON pp.product_tmpl_id = pt.id
+                LEFT JOIN (
+                    stock_quant sq
+                    INNER JOIN stock_location sl ON sl.id = sq.location_id
+                        AND sl.usage = 'internal' {location_filter}
+                ) ON sq.product_id = pp.id
+                WHERE pt.type = 'product'
+                    AND pt.target_audience IS NOT NULL
+                    AND pt.min_stock_level > 0
+                    {''.join(f" AND {condition}" for condition in conditions)}
+                GROUP BY pt.id
+                HAVING COALESCE(SUM(sq.quantity), 0) <= pt.min_stock_level
+            ) low
+            {seek}
+            ORDER BY low.shortage DESC, low.product_id
+            LIMIT %(limit)s
         """
         
-        self.env.cr.execute(query)
-        results = self.env.cr.dictfetchall()
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.env['product.template'].flush_model(['name', 'brand', 'target_audience', 'min_stock_level', 'type'])
+        self.env.cr.execute(query, params)
+        rows = self.env.cr.dictfetchall()
         
-        low_stock_products = []
-        for result in results:
-            product = self.env['product.template'].browse(result['id'])
-            low_stock_products.append({
-                'product': product,
-                'current_stock': result['current_stock'],
-                'min_stock': result['min_stock_level'],
-                'shortage': result['shortage']
-            })
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.env['product.template']._encode_fashion_cursor(rows[-1]['shortage'], rows[-1]['product_id'])
+        return rows, next_cursor
+    
+    @api.model
+    def _iter_fashion_low_stock_csv(self, batch_size=1000, **filters):
+        """Yield the full low-stock report as CSV chunks, one keyset batch at a time"""
+        registry, uid, context = self.env.registry, self.env.uid, dict(self.env.context)
         
-        return low_stock_products
+        def generate():
+            # Streaming outlives the request transaction, so read through a cursor of our own
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(CSV_LOW_STOCK_COLUMNS)
+                cursor = None
+                while True:
+                    rows, cursor = env['stock.quant']._get_fashion_low_stock_rows(
+                        limit=batch_size, cursor=cursor, **filters)
+                    writer.writerows([row[column] for column in CSV_LOW_STOCK_COLUMNS] for row in rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    if not cursor:
+                        break
+        
+        return generate()
 
 class StockMove(models.Model):
     _inherit = 'stock.move'
@@ -51,15 +122,115 @@ class StockMove(models.Model):
         """Override to update stock status after stock moves"""
         result = super(StockMove, self)._action_done(cancel_backorder)
         
-        # Batch update stock status for fashion products
-        fashion_products = self.mapped('product_id.product_tmpl_id').filtered('target_audience')
-        if fashion_products:
-            fashion_products._compute_stock_status()
+        # Queue on-hand deltas, applied to stock status once per transaction
+        result._register_fashion_stock_deltas()
                 
         return result
+    
+    def _register_fashion_stock_deltas(self):
+        """Accumulate the internal stock deltas of done moves for the end of the transaction"""
+        deltas = defaultdict(float)
+        for move in self:
+            template = move.product_id.product_tmpl_id
+            if move.state != 'done' or not template.target_audience:
+                continue
+            into_stock = move.location_dest_id.usage == 'internal'
+            out_of_stock = move.location_id.usage == 'internal'
+            if into_stock == out_of_stock:
+                continue
+            qty = move.product_uom._compute_quantity(move.quantity, move.product_id.uom_id, rounding_method='HALF-UP')
+            deltas[template.id] += qty if into_stock else -qty
+        
+        if not deltas:
+            return
+        
+        cr = self.env.cr
+        pending = cr.precommit.data.get('fashion_stock_deltas')
+        if pending is None:
+            pending = cr.precommit.data['fashion_stock_deltas'] = defaultdict(float)
+            env = self.env
+            
+            @cr.precommit.add
+            def apply_fashion_stock_deltas():
+                env['product.template']._apply_fashion_stock_deltas(
+                    cr.precommit.data.pop('fashion_stock_deltas', {}))
+        
+        for template_id, qty in deltas.items():
+            pending[template_id] += qty
+
+class FashionInventoryReportMixin(models.AbstractModel):
+    _name = 'fashion.inventory.report.mixin'
+    _description = 'Fashion Inventory Report Backing View'
+    
+    refreshed_at = fields.Datetime(string='Last Refreshed', compute='_compute_refreshed_at')
+    
+    @api.model
+    def _is_materialized(self):
+        """Whether the reports are backed by materialized views"""
+        param = self.env['ir.config_parameter'].sudo().get_param('fashion_ecommerce.inventory_report_materialized')
+        return param in ('1', 'True', 'true')
+    
+    def _get_refreshed_at_param(self):
+        return f"fashion_ecommerce.{self._table.removeprefix('fashion_')}_refreshed_at"
+    
+    def _compute_refreshed_at(self):
+        # Kept out of the view rows, so a concurrent refresh only rewrites changed rows
+        if self._is_materialized():
+            refreshed_at = self.env['ir.config_parameter'].sudo().get_param(self._get_refreshed_at_param())
+        else:
+            refreshed_at = fields.Datetime.now()
+        for row in self:
+            row.refreshed_at = refreshed_at or False
+    
+    @api.model
+    def _set_refreshed_at(self):
+        """Record when the materialized view was last filled"""
+        self.env['ir.config_parameter'].sudo().set_param(
+            self._get_refreshed_at_param(), fields.Datetime.to_string(fields.Datetime.now()))
+    
+    def _drop_report_relation(self):
+        """Drop the report relation, whether it is a plain or a materialized view"""
+        self.env.cr.execute("SELECT relkind FROM pg_class WHERE relname = %s", [self._table])
+        row = self.env.cr.fetchone()
+        if row and row[0] == 'm':
+            self.env.cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table} CASCADE")
+        else:
+            tools.drop_view_if_exists(self.env.cr, self._table)
+    
+    def _create_report_relation(self, query):
+        """Create the report as a plain or a materialized view of query, whose id is a stable key"""
+        self._drop_report_relation()
+        if self._is_materialized():
+            self.env.cr.execute(f"CREATE MATERIALIZED VIEW {self._table} AS ({query})")
+            # A unique index is required to refresh concurrently
+            self.env.cr.execute(f"CREATE UNIQUE INDEX {self._table}_id_uniq ON {self._table} (id)")
+            self.env.cr.execute(f"CREATE INDEX {self._table}_product_idx ON {self._table} (product_id)")
+            self._set_refreshed_at()
+        else:
+            self.env.cr.execute(f"CREATE OR REPLACE VIEW {self._table} AS ({query})")
+    
+    @api.model
+    def _refresh_report(self):
+        """Refresh the materialized view without blocking readers"""
+        if not self._is_materialized():
+            return False
+        self.env.flush_all()
+        start = time.perf_counter()
+        self.env.cr.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self._set_refreshed_at()
+        self.invalidate_model()
+        _logger.info(f"{self._description} refreshed in {time.perf_counter() - start:.2f}s")
+        return True
+    
+    def action_refresh_report(self):
+        """Refresh the report on demand from the list view"""
+        self._refresh_report()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
 
 class FashionInventoryReport(models.Model):
     _name = 'fashion.inventory.report'
+    _inherit = 'fashion.inventory.report.mixin'
     _description = 'Fashion Inventory Report'
     _auto = False
     _rec_name = 'product_id'
@@ -81,35 +252,86 @@ class FashionInventoryReport(models.Model):
     ], string='Stock Status')
     
     def init(self):
-        tools.drop_view_if_exists(self.env.cr, self._table)
-        # Optimized SQL with proper indexing hints
-        query = f"""
-            CREATE OR REPLACE VIEW {self._table} AS (
-                SELECT
-                    pt.id,
-                    pt.id as product_id,
-                    pt.brand,
-                    pt.target_audience,
-                    COALESCE(stock_data.qty_available, 0) as qty_available,
-                    pt.min_stock_level,
-                    pt.max_stock_level,
-                    CASE 
-                        WHEN COALESCE(stock_data.qty_available, 0) <= 0 THEN 'out_of_stock'
-                        WHEN COALESCE(stock_data.qty_available, 0) <= pt.min_stock_level THEN 'low_stock'
-                        ELSE 'in_stock'
-                    END as stock_status
-                FROM product_template pt
-                LEFT JOIN (
-                    SELECT 
-                        pp.product_tmpl_id,
-                        SUM(sq.quantity) as qty_available
-                    FROM product_product pp
-                    INNER JOIN stock_quant sq ON sq.product_id = pp.id
-                    INNER JOIN stock_location sl ON sl.id = sq.location_id AND sl.usage = 'internal'
-                    GROUP BY pp.product_tmpl_id
-                ) stock_data ON stock_data.product_tmpl_id = pt.id
-                WHERE pt.target_audience IS NOT NULL
-                AND pt.type = 'product'
-            )
-        """
-        self.env.cr.execute(query)
+        # One row per product, keyed by the template id
+        self._create_report_relation("""
+            SELECT
+                pt.id,
+                pt.id as product_id,
+                pt.brand,
+                pt.target_audience,
+                COALESCE(stock_data.qty_available, 0) as qty_available,
+                pt.min_stock_level,
+                pt.max_stock_level,
+                CASE 
+                    WHEN COALESCE(stock_data.qty_available, 0) <= 0 THEN 'out_of_stock'
+                    WHEN COALESCE(stock_data.qty_available, 0) <= pt.min_stock_level THEN 'low_stock'
+                    ELSE 'in_stock'
+                END as stock_status
+            FROM product_template pt
+            LEFT JOIN (
+                SELECT 
+                    pp.product_tmpl_id,
+                    SUM(sq.quantity) as qty_available
+                FROM product_product pp
+                INNER JOIN stock_quant sq ON sq.product_id = pp.id
+                INNER JOIN stock_location sl ON sl.id = sq.location_id AND sl.usage = 'internal'
+                GROUP BY pp.product_tmpl_id
+            ) stock_data ON stock_data.product_tmpl_id = pt.id
+            WHERE pt.target_audience IS NOT NULL
+            AND pt.type = 'product'
+        """)
+    
+    @api.model
+    def _set_materialized(self, materialized):
+        """Switch the inventory reports between plain and materialized views"""
+        self.env['ir.config_parameter'].sudo().set_param(
+            'fashion_ecommerce.inventory_report_materialized', str(bool(materialized)))
+        self.init()
+        self.env['fashion.inventory.location.report'].init()
+    
+    @api.model
+    def _cron_refresh_report(self):
+        """Scheduled refresh of the materialized inventory reports"""
+        self._refresh_report()
+        self.env['fashion.inventory.location.report']._refresh_report()
+
+
+class FashionInventoryLocationReport(models.Model):
+    _name = 'fashion.inventory.location.report'
+    _inherit = 'fashion.inventory.report.mixin'
+    _description = 'Fashion Inventory by Location'
+    _auto = False
+    _rec_name = 'product_id'
+    _order = 'product_id, warehouse_id, location_id'
+    
+    product_id = fields.Many2one('product.template', string='Product')
+    brand = fields.Char(string='Brand')
+    target_audience = fields.Selection([
+        ('men', 'Men'),
+        ('women', 'Women'),
+        ('children', 'Children')
+    ], string='Target Audience')
+    location_id = fields.Many2one('stock.location', string='Location')
+    warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse')
+    quantity = fields.Float(string='Quantity')
+    
+    def init(self):
+        # One row per product and internal location holding quants; the id is
+        # the oldest quant of the pair, so it survives quants appearing elsewhere
+        self._create_report_relation("""
+            SELECT
+                MIN(sq.id) as id,
+                pt.id as product_id,
+                pt.brand,
+                pt.target_audience,
+                sq.location_id,
+                sl.warehouse_id,
+                SUM(sq.quantity) as quantity
+            FROM product_template pt
+            INNER JOIN product_product pp ON pp.product_tmpl_id = pt.id
+            INNER JOIN stock_quant sq ON sq.product_id = pp.id
+            INNER JOIN stock_location sl ON sl.id = sq.location_id AND sl.usage = 'internal'
+            WHERE pt.target_audience IS NOT NULL
+            AND pt.type = 'product'
+            GROUP BY pt.id, sq.location_id, sl.warehouse_id
+        """)
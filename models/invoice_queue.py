@@ -0,0 +1,156 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+INVOICE_QUEUE_MAX_ATTEMPTS = 3
+# Delay before the first retry of a failed entry, doubled on each further attempt
+INVOICE_QUEUE_RETRY_DELAY = timedelta(minutes=5)
+
+class FashionInvoiceQueue(models.Model):
+    _name = 'fashion.invoice.queue'
+    _description = 'Fashion Invoice Queue'
+    _rec_name = 'order_id'
+    _order = 'enqueued_at'
+    _log_access = False
+
+    order_id = fields.Many2one('sale.order', string='Order', required=True, ondelete='cascade')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed')
+    ], string='Status', default='pending', required=True)
+    enqueued_at = fields.Datetime(string='Enqueued At', default=fields.Datetime.now, required=True)
+    processed_at = fields.Datetime(string='Processed At')
+    attempts = fields.Integer(string='Attempts', default=0)
+    next_attempt_at = fields.Datetime(string='Next Attempt At')
+    error = fields.Text(string='Last Error')
+    skip_reason = fields.Char(string='Skip Reason')
+
+    _sql_constraints = [
+        ('unique_order', 'unique(order_id)', 'An order can only be queued for invoicing once!')
+    ]
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS fashion_invoice_queue_pending_idx
+            ON fashion_invoice_queue (enqueued_at) WHERE state = 'pending'
+        """)
+
+    @api.model
+    def _enqueue(self, orders):
+        """Queue orders for invoicing; orders already queued are left untouched"""
+        if not orders:
+            return
+        self.env.cr.execute("""
+            INSERT INTO fashion_invoice_queue (order_id, state, enqueued_at, attempts)
+            SELECT order_id, 'pending', %s, 0 FROM unnest(%s::int[]) AS q(order_id)
+            ON CONFLICT (order_id) DO NOTHING
+        """, [fields.Datetime.now(), orders.ids])
+        self._trigger_worker()
+
+    @api.model
+    def _trigger_worker(self):
+        """Wake the worker up once the transaction commits instead of waiting for the next run"""
+        cron = self.env.ref('fashion_ecommerce.ir_cron_fashion_invoice_queue', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model
+    def _cron_process_invoice_queue(self, batch_size=100, max_batches=20):
+        """Create and post the invoices of queued orders, batch by batch"""
+        testing = getattr(threading.current_thread(), 'testing', False)
+        for _batch in range(max_batches):
+            # Concurrent workers skip each other's batches instead of waiting on them
+            self.env.cr.execute("""
+                SELECT id FROM fashion_invoice_queue
+                WHERE state = 'pending'
+                AND (next_attempt_at IS NULL OR next_attempt_at <= %s)
+                ORDER BY enqueued_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, [fields.Datetime.now(), batch_size])
+            entries = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not entries:
+                break
+            self._process_entries(entries)
+            if not testing:
+                self.env.cr.commit()
+
+    def _process_entries(self, entries):
+        """Invoice a batch as a whole, falling back to one order at a time on failure"""
+        start = time.perf_counter()
+        try:
+            with self.env.cr.savepoint():
+                self._invoice_orders(entries)
+        except Exception as e:
+            _logger.warning(f"Invoice batch of {len(entries)} orders failed, retrying per order: {str(e)}")
+            for entry in entries:
+                try:
+                    with self.env.cr.savepoint():
+                        self._invoice_orders(entry)
+                except Exception as entry_error:
+                    # Back off so a failing order is not picked again in this run
+                    attempts = entry.attempts + 1
+                    entry.write({
+                        'attempts': attempts,
+                        'error': str(entry_error),
+                        'state': 'failed' if attempts >= INVOICE_QUEUE_MAX_ATTEMPTS else 'pending',
+                        'next_attempt_at': fields.Datetime.now() + INVOICE_QUEUE_RETRY_DELAY * 2 ** (attempts - 1),
+                    })
+        _logger.info(f"Processed {len(entries)} queued invoices in {time.perf_counter() - start:.2f}s")
+
+    def _invoice_orders(self, entries):
+        """Create one posted invoice per order; orders with nothing left to invoice are skipped"""
+        now = fields.Datetime.now()
+        skipped = entries.filtered(lambda entry: entry.order_id.invoice_status != 'to invoice')
+        for invoice_status in set(skipped.order_id.mapped('invoice_status')):
+            status_entries = skipped.filtered(lambda entry: entry.order_id.invoice_status == invoice_status)
+            status_entries.write({
+                'state': 'skipped',
+                'processed_at': now,
+                'skip_reason': f"Nothing to invoice (invoice status: {invoice_status or 'none'})",
+            })
+        invoiced = entries - skipped
+        if invoiced:
+            invoices = invoiced.order_id._create_invoices(grouped=True)
+            invoices.action_post()
+            invoiced.write({'state': 'done', 'processed_at': now, 'error': False, 'skip_reason': False})
+
+    @api.model
+    def _get_queue_stats(self):
+        """Return the depth of the queue and the age of its oldest pending entry"""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT COUNT(*) FILTER (WHERE state = 'pending'),
+                   COUNT(*) FILTER (WHERE state = 'failed'),
+                   EXTRACT(EPOCH FROM (%s - MIN(enqueued_at) FILTER (WHERE state = 'pending')))
+            FROM fashion_invoice_queue
+        """, [fields.Datetime.now()])
+        pending, failed, lag = self.env.cr.fetchone()
+        return {'pending': pending, 'failed': failed, 'lag_seconds': float(lag or 0.0)}
+
+    @api.model
+    def action_show_queue_stats(self):
+        """Display queue depth and lag"""
+        stats = self._get_queue_stats()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': "Invoice queue",
+                'message': f"{stats['pending']} pending, {stats['failed']} failed, "
+                           f"oldest pending for {stats['lag_seconds']:.0f}s.",
+                'type': 'warning' if stats['failed'] else 'info',
+                'sticky': False,
+            },
+        }
+
+    def action_retry(self):
+        """Put failed entries back in the queue"""
+        self.write({'state': 'pending', 'attempts': 0, 'next_attempt_at': False})
+        self._trigger_worker()
@@ -1,5 +1,66 @@
+import base64
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+
 from odoo import models, fields, api
 from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
+
+from ..tools.cache import FashionCache, bump_version_on_commit, ensure_version_counter, get_version
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds of the price facet buckets; the last bucket is open-ended
+FASHION_PRICE_BUCKETS = [0, 25, 50, 100, 200]
+FASHION_RATING_BUCKETS = [4, 3, 2, 1]
+FASHION_FACET_FIELDS = ['brand', 'color', 'clothing_size', 'target_audience', 'price_bucket', 'rating_bucket']
+
+# Fields whose changes affect the cached filter options, counts and B2B catalog pages
+FASHION_CATALOG_FIELDS = {
+    'name', 'brand', 'color', 'clothing_size', 'season', 'list_price', 'website_published',
+    'is_published', 'target_audience', 'sale_ok', 'active', 'min_stock_level',
+}
+
+# Text search configurations for the languages PostgreSQL can stem
+FASHION_FTS_CONFIGS = {
+    'da': 'danish', 'de': 'german', 'en': 'english', 'es': 'spanish',
+    'fi': 'finnish', 'fr': 'french', 'it': 'italian', 'nl': 'dutch',
+    'pt': 'portuguese', 'ru': 'russian', 'sv': 'swedish', 'tr': 'turkish',
+}
+
+# Listing sort modes as (field, direction); id is always the tie-breaker
+FASHION_SORT_ORDERS = {
+    'name': ('name', 'asc'),
+    'relevance': ('relevance', 'desc'),
+    'price_asc': ('list_price', 'asc'),
+    'price_desc': ('list_price', 'desc'),
+    'newest': ('create_date', 'desc'),
+    'top_rated': ('average_rating', 'desc'),
+    'most_reviewed': ('review_count', 'desc'),
+}
+
+# Sorted listing indexes, restricted to the rows the shop can show
+FASHION_LISTING_INDEX_WHERE = 'is_published AND sale_ok AND active AND target_audience IS NOT NULL'
+FASHION_LISTING_INDEXES = {
+    'price': ['list_price', 'id'],
+    'newest': ['create_date DESC', 'id DESC'],
+    'rating': ['average_rating DESC', 'id DESC'],
+    'reviews': ['review_count DESC', 'id DESC'],
+}
+
+# Stock status of a product from its on-hand quantity and minimum level
+FASHION_STOCK_STATUS_SQL = """
+    CASE WHEN {qty} <= 0 THEN 'out_of_stock'
+         WHEN {qty} <= {min} THEN 'low_stock'
+         ELSE 'in_stock'
+    END
+"""
+
+_filter_options_cache = FashionCache(size=512)
+_count_cache = FashionCache(size=2048)
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
@@ -35,6 +96,9 @@ class ProductTemplate(models.Model):
     # Inventory Management
     min_stock_level = fields.Float(string="Minimum Stock Level", default=10.0)
     max_stock_level = fields.Float(string="Maximum Stock Level", default=100.0)
+    fashion_qty_on_hand = fields.Float(
+        string="Fashion On Hand", readonly=True, copy=False,
+        help="Internal stock maintained incrementally from done stock moves")
     stock_status = fields.Selection([
         ('in_stock', 'In Stock'),
         ('low_stock', 'Low Stock'),
@@ -50,15 +114,191 @@ class ProductTemplate(models.Model):
     review_count = fields.Integer(string='Review Count', compute='_compute_review_stats', store=True)
     average_rating = fields.Float(string='Average Rating', compute='_compute_review_stats', store=True)
     
-    @api.depends('qty_available', 'min_stock_level')
+    def init(self):
+        ensure_version_counter(self.env.cr, 'catalog')
+        ensure_version_counter(self.env.cr, 'stock')
+        self._init_fashion_listing_indexes()
+        self._init_fashion_search_vector()
+        self._init_fashion_qty_on_hand()
+
+    def _init_fashion_qty_on_hand(self):
+        """Fill the on-hand quantity of templates that have none yet from their quants.
+
+        The column has no default on purpose: when it is added on upgrade its
+        rows stay NULL, so they are rebuilt here instead of starting at 0.
+        post_init_hook does the same at install.
+        """
+        self.env.cr.execute("SELECT id FROM product_template WHERE fashion_qty_on_hand IS NULL")
+        template_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not template_ids:
+            return
+        self._rebuild_fashion_stock_status(template_ids)
+        self.env.cr.execute("UPDATE product_template SET fashion_qty_on_hand = 0 WHERE fashion_qty_on_hand IS NULL")
+        self.invalidate_model(['fashion_qty_on_hand'])
+        _logger.info(f"Initialised the fashion on-hand quantity of {len(template_ids)} products")
+
+    def _init_fashion_listing_indexes(self):
+        """Create the partial composite indexes backing the listing sort modes.
+
+        Each sort key exists with and without a leading target_audience, so
+        both the audience pages and the all-categories listings can walk an
+        index in sort order and stop after one page.
+        """
+        for name, expressions in FASHION_LISTING_INDEXES.items():
+            create_index(self.env.cr, f'product_template_fashion_{name}_idx', 'product_template',
+                         expressions, where=FASHION_LISTING_INDEX_WHERE)
+            create_index(self.env.cr, f'product_template_fashion_audience_{name}_idx', 'product_template',
+                         ['target_audience'] + expressions, where=FASHION_LISTING_INDEX_WHERE)
+
+    def _init_fashion_search_vector(self):
+        """Create the weighted search vector, its GIN index and the trigger maintaining it.
+
+        The vector is kept outside the ORM so that reading products never
+        loads it. Name weighs more than brand, which weighs more than the
+        descriptions, and all translations of a field are indexed.
+        """
+        cr = self.env.cr
+        params = self.env['ir.config_parameter'].sudo()
+        config = params.get_param('fashion_ecommerce.fts_config') or self._guess_fashion_fts_config()
+        cr.execute("SELECT cfgname FROM pg_ts_config WHERE cfgname = %s", [config])
+        config = cr.fetchone() and config or 'simple'
+        params.set_param('fashion_ecommerce.fts_config', config)
+
+        cr.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'product_template' AND column_name = 'fashion_search_vector'
+        """)
+        column_exists = bool(cr.fetchone())
+        if not column_exists:
+            cr.execute("ALTER TABLE product_template ADD COLUMN fashion_search_vector tsvector")
+
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION fashion_product_search_vector() RETURNS trigger AS $$
+            DECLARE
+                config regconfig := TG_ARGV[0]::regconfig;
+            BEGIN
+                NEW.fashion_search_vector :=
+                    setweight(to_tsvector(config, COALESCE(
+                        (SELECT string_agg(value, ' ') FROM jsonb_each_text(NEW.name)), '')), 'A') ||
+                    setweight(to_tsvector(config, COALESCE(NEW.brand, '')), 'B') ||
+                    setweight(to_tsvector(config, COALESCE(
+                        (SELECT string_agg(value, ' ') FROM jsonb_each_text(NEW.description_sale)), '')), 'C') ||
+                    setweight(to_tsvector(config, COALESCE(
+                        (SELECT string_agg(regexp_replace(value, '<[^>]*>', ' ', 'g'), ' ')
+                         FROM jsonb_each_text(NEW.description)), '')), 'C');
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("DROP TRIGGER IF EXISTS fashion_product_search_vector_trg ON product_template")
+        cr.execute(f"""
+            CREATE TRIGGER fashion_product_search_vector_trg
+            BEFORE INSERT OR UPDATE OF name, brand, description, description_sale ON product_template
+            FOR EACH ROW EXECUTE FUNCTION fashion_product_search_vector('{config}')
+        """)
+        create_index(cr, 'product_template_fashion_search_vector_idx', 'product_template',
+                     ['fashion_search_vector'], method='gin')
+
+        if not column_exists or params.get_param('fashion_ecommerce.fts_config_applied') != config:
+            self._rebuild_fashion_search_vector()
+            params.set_param('fashion_ecommerce.fts_config_applied', config)
+
+    @api.model
+    def _guess_fashion_fts_config(self):
+        """Pick the PostgreSQL text search configuration matching the website language"""
+        website = self.env['website'].search([], limit=1)
+        lang_code = website.default_lang_id.code or self.env.lang or 'en_US'
+        config = FASHION_FTS_CONFIGS.get(lang_code.split('_')[0], 'simple')
+        self.env.cr.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = %s", [config])
+        return config if self.env.cr.fetchone() else 'simple'
+
+    @api.model
+    def _rebuild_fashion_search_vector(self):
+        """Recompute the search vector of every product through the maintenance trigger"""
+        self.flush_model(['name', 'brand', 'description', 'description_sale'])
+        self.env.cr.execute("UPDATE product_template SET name = name")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        bump_version_on_commit(self.env.cr, 'catalog')
+        return products
+
+    def write(self, vals):
+        result = super().write(vals)
+        if FASHION_CATALOG_FIELDS.intersection(vals):
+            bump_version_on_commit(self.env.cr, 'catalog')
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        bump_version_on_commit(self.env.cr, 'catalog')
+        return result
+
+    @api.depends('fashion_qty_on_hand', 'min_stock_level')
     def _compute_stock_status(self):
         for product in self:
-            if product.qty_available <= 0:
+            if product.fashion_qty_on_hand <= 0:
                 product.stock_status = 'out_of_stock'
-            elif product.qty_available <= product.min_stock_level:
+            elif product.fashion_qty_on_hand <= product.min_stock_level:
                 product.stock_status = 'low_stock'
             else:
                 product.stock_status = 'in_stock'
+
+    @api.model
+    def _apply_fashion_stock_deltas(self, deltas):
+        """Add on-hand quantity deltas {template_id: qty} and refresh stock status in one UPDATE"""
+        if not deltas:
+            return
+        self.flush_model(['fashion_qty_on_hand', 'min_stock_level', 'stock_status'])
+        template_ids, quantities = zip(*deltas.items())
+        new_qty = 'COALESCE(pt.fashion_qty_on_hand, 0) + d.delta'
+        self.env.cr.execute(f"""
+            UPDATE product_template pt
+            SET fashion_qty_on_hand = {new_qty},
+                stock_status = {FASHION_STOCK_STATUS_SQL.format(qty=new_qty, min='pt.min_stock_level')}
+            FROM unnest(%s::int[], %s::float8[]) AS d(id, delta)
+            WHERE pt.id = d.id
+            RETURNING pt.id, pt.fashion_qty_on_hand, d.delta
+        """, [list(template_ids), list(quantities)])
+        restocked = [
+            template_id for template_id, qty, delta in self.env.cr.fetchall()
+            if qty > 0 and qty - delta <= 0
+        ]
+        self.invalidate_model(['fashion_qty_on_hand', 'stock_status'])
+        bump_version_on_commit(self.env.cr, 'stock')
+        self.env['fashion.wishlist.event']._enqueue_back_in_stock(restocked)
+
+    @api.model
+    def _rebuild_fashion_stock_status(self, template_ids=None):
+        """Recompute on-hand quantity and stock status from the quants of internal locations.
+
+        Meant for recovery, e.g. after quants were imported or edited without
+        stock moves. Runs as one set-based UPDATE over all fashion products,
+        or only over template_ids when given.
+        """
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.flush_model(['fashion_qty_on_hand', 'min_stock_level', 'stock_status'])
+        template_filter = 'AND pt.id = ANY(%s)' if template_ids else ''
+        self.env.cr.execute(f"""
+            UPDATE product_template pt
+            SET fashion_qty_on_hand = stock.qty,
+                stock_status = {FASHION_STOCK_STATUS_SQL.format(qty='stock.qty', min='pt.min_stock_level')}
+            FROM (
+                SELECT pt.id, COALESCE(SUM(sq.quantity), 0) AS qty
+                FROM product_template pt
+                LEFT JOIN product_product pp ON pp.product_tmpl_id = pt.id
+                LEFT JOIN stock_quant sq ON sq.product_id = pp.id
+                    AND sq.location_id IN (SELECT id FROM stock_location WHERE usage = 'internal')
+                WHERE pt.target_audience IS NOT NULL {template_filter}
+                GROUP BY pt.id
+            ) AS stock
+            WHERE pt.id = stock.id
+        """, [list(template_ids)] if template_ids else [])
+        updated = self.env.cr.rowcount
+        self.invalidate_model(['fashion_qty_on_hand', 'stock_status'])
+        bump_version_on_commit(self.env.cr, 'stock')
+        return updated
     
     @api.depends('fashion_review_ids.state', 'fashion_review_ids.rating')
     def _compute_review_stats(self):
@@ -70,7 +310,328 @@ class ProductTemplate(models.Model):
                 product.average_rating = round(total_rating / len(published_reviews), 1)
             else:
                 product.average_rating = 0.0
-    
+
+    @api.model
+    def _get_fashion_base_domain(self):
+        """Get base domain for fashion products shown on the website"""
+        return [
+            ('website_published', '=', True),
+            ('sale_ok', '=', True),
+            ('target_audience', '!=', False)
+        ]
+
+    @api.model
+    def _get_fashion_search_mode(self):
+        """Return 'fulltext' or 'ilike' depending on the configured search backend"""
+        mode = self.env['ir.config_parameter'].sudo().get_param('fashion_ecommerce.search_mode', 'fulltext')
+        return 'ilike' if mode == 'ilike' else 'fulltext'
+
+    @api.model
+    def _get_fashion_fts_config(self):
+        """Return the text search configuration used for the product search vector"""
+        return self.env['ir.config_parameter'].sudo().get_param('fashion_ecommerce.fts_config', 'simple')
+
+    @api.model
+    def _split_fashion_search(self, domain, search):
+        """Return (domain, fulltext_term) for a text search.
+
+        In full-text mode the term is matched against the search vector by
+        the SQL helpers; otherwise it falls back to the ilike domain on name,
+        brand and descriptions.
+        """
+        if not search:
+            return domain, None
+        if self._get_fashion_search_mode() == 'fulltext':
+            return domain, search
+        return domain + [
+            '|', '|', '|',
+            ('name', 'ilike', search),
+            ('brand', 'ilike', search),
+            ('description', 'ilike', search),
+            ('description_sale', 'ilike', search)
+        ], None
+
+    @api.model
+    def _get_fashion_query_parts(self, domain, search=None):
+        """Return (from_clause, where_clause, params) for domain with access rules applied"""
+        self.check_access_rights('read')
+        query = self._where_calc(domain)
+        self._apply_ir_rules(query, 'read')
+        if search:
+            query.add_where(
+                '"product_template".fashion_search_vector @@ websearch_to_tsquery(%s::regconfig, %s)',
+                [self._get_fashion_fts_config(), search])
+        from_clause, where_clause, params = query.get_sql()
+        return from_clause, where_clause or 'TRUE', params
+
+    @api.model
+    def _get_fashion_facets(self, domain, search=None):
+        """Compute sidebar facet counts for the products matching domain.
+
+        All facets are aggregated in a single GROUPING SETS query over the
+        filtered product set, so the counts always reflect the filters that
+        are currently applied.
+        """
+        self.flush_model(['brand', 'color', 'clothing_size', 'target_audience',
+                          'list_price', 'average_rating'])
+        domain, fulltext = self._split_fashion_search(domain, search)
+        from_clause, where_clause, where_params = self._get_fashion_query_parts(domain, fulltext)
+        query = f"""
+            WITH filtered AS (
+                SELECT "product_template".brand,
+                       "product_template".color,
+                       "product_template".clothing_size,
+                       "product_template".target_audience,
+                       "product_template".list_price,
+                       width_bucket("product_template".list_price::float8, %s::float8[]) AS price_bucket,
+                       FLOOR(COALESCE("product_template".average_rating, 0))::int AS rating_bucket
+                FROM {from_clause}
+                WHERE {where_clause}
+            )
+            SELECT GROUPING({', '.join(FASHION_FACET_FIELDS)}) AS grouping_id,
+                   {', '.join(FASHION_FACET_FIELDS)},
+                   COUNT(*) AS count,
+                   MIN(list_price) AS min_price,
+                   MAX(list_price) AS max_price
+            FROM filtered
+            GROUP BY GROUPING SETS (({'), ('.join(FASHION_FACET_FIELDS)}), ())
+        """
+        self.env.cr.execute(query, [FASHION_PRICE_BUCKETS] + list(where_params))
+
+        all_grouped = (1 << len(FASHION_FACET_FIELDS)) - 1
+        grouping_ids = {
+            all_grouped ^ (1 << (len(FASHION_FACET_FIELDS) - 1 - index)): field_name
+            for index, field_name in enumerate(FASHION_FACET_FIELDS)
+        }
+
+        facets = {field_name: {} for field_name in FASHION_FACET_FIELDS}
+        facets.update(total=0, price_range={'min': 0, 'max': 1000})
+        for row in self.env.cr.dictfetchall():
+            if row['grouping_id'] == all_grouped:
+                facets['total'] = row['count']
+                facets['price_range'] = {
+                    'min': row['min_price'] or 0,
+                    'max': row['max_price'] if row['max_price'] is not None else 1000,
+                }
+                continue
+            field_name = grouping_ids[row['grouping_id']]
+            if row[field_name] is not None:
+                facets[field_name][row[field_name]] = row['count']
+
+        return self._format_fashion_facets(facets)
+
+    @api.model
+    def _get_fashion_filter_options(self):
+        """Get the unfiltered sidebar options, cached per worker until the catalog version changes"""
+        website = self.env['website'].get_current_website()
+        # Record rules make the options depend on the user and its companies
+        key = (self.env.cr.dbname, website.id, self.env.lang, self.env.uid, tuple(sorted(self.env.companies.ids)))
+        version = get_version(self.env.cr, 'catalog')
+        options = _filter_options_cache.get(key, version)
+        if options is None:
+            options = _filter_options_cache.set(
+                key, self._get_fashion_facets(self._get_fashion_base_domain()), version)
+        return options
+
+    @api.model
+    def _format_fashion_facets(self, facets):
+        """Turn raw facet counts into ordered lists the templates can render"""
+        def selection_facet(field_name):
+            counts = facets[field_name]
+            return [
+                {'value': value, 'label': label, 'count': counts[value]}
+                for value, label in self._fields[field_name].selection
+                if value in counts
+            ]
+
+        def text_facet(field_name):
+            counts = facets[field_name]
+            return [
+                {'value': value, 'label': value, 'count': counts[value]}
+                for value in sorted(counts) if value
+            ]
+
+        price_facet = []
+        for bucket, count in sorted(facets['price_bucket'].items()):
+            if bucket < 1:
+                continue
+            low = FASHION_PRICE_BUCKETS[bucket - 1]
+            high = FASHION_PRICE_BUCKETS[bucket] if bucket < len(FASHION_PRICE_BUCKETS) else None
+            price_facet.append({
+                'value': bucket,
+                'label': f"${low} - ${high}" if high else f"${low}+",
+                'min': low,
+                'max': high,
+                'count': count,
+            })
+
+        # Rating facets are "N stars & up", so counts are cumulative
+        rating_facet = []
+        for min_rating in FASHION_RATING_BUCKETS:
+            count = sum(c for bucket, c in facets['rating_bucket'].items() if bucket >= min_rating)
+            if count:
+                rating_facet.append({'value': min_rating, 'label': f"{min_rating}+ stars", 'count': count})
+
+        return {
+            'total': facets['total'],
+            'price_range': facets['price_range'],
+            'brand': text_facet('brand'),
+            'color': text_facet('color'),
+            'size': selection_facet('clothing_size'),
+            'audience': selection_facet('target_audience'),
+            'price': price_facet,
+            'rating': rating_facet,
+        }
+
+    @api.model
+    def _encode_fashion_cursor(self, sort_value, product_id):
+        """Encode the (sort value, id) key of the last row of a page as an opaque URL token"""
+        payload = json.dumps([sort_value, product_id]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    @api.model
+    def _decode_fashion_cursor(self, cursor):
+        """Decode a cursor token, raising ValueError if it was tampered with"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            sort_value, product_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid pagination cursor: {cursor}") from e
+        if not isinstance(sort_value, (str, int, float)) or not isinstance(product_id, int):
+            raise ValueError(f"Invalid pagination cursor: {cursor}")
+        return sort_value, product_id
+
+    @api.model
+    def _get_fashion_sort(self, order, search=None):
+        """Return (field, direction) for a listing sort mode, defaulting to name"""
+        if order == 'relevance' and not search:
+            order = 'name'
+        return FASHION_SORT_ORDERS.get(order, FASHION_SORT_ORDERS['name'])
+
+    @api.model
+    def _fashion_search_page(self, domain, limit=20, page=1, cursor=None, search=None, order='name'):
+        """Fetch one page of products in the requested sort order, with id as tie-breaker.
+
+        With a cursor the page is read with a keyset condition, so deep pages
+        cost the same as the first one; otherwise the classic page offset is
+        used so existing ``page=`` URLs keep working. One extra row is fetched
+        to know whether there is a next page without counting.
+        """
+        domain, fulltext = self._split_fashion_search(domain, search)
+        sort_field, direction = self._get_fashion_sort(order, fulltext)
+        if fulltext:
+            return self._fashion_fulltext_page(domain, fulltext, limit, page, cursor, sort_field, direction)
+
+        if cursor:
+            sort_value, product_id = self._decode_fashion_cursor(cursor)
+            if sort_field == 'create_date':
+                sort_value = datetime.fromisoformat(sort_value)
+            operator = '>' if direction == 'asc' else '<'
+            domain = domain + [
+                '|', (sort_field, operator, sort_value),
+                '&', (sort_field, '=', sort_value), ('id', operator, product_id)
+            ]
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+
+        products = self.search(domain, limit=limit + 1, offset=offset,
+                               order=f'{sort_field} {direction}, id {direction}')
+        has_next = len(products) > limit
+        products = products[:limit]
+        next_cursor = None
+        if has_next:
+            sort_value = products[-1][sort_field]
+            if sort_field == 'create_date':
+                # Keep the microseconds, or rows created in the same second are skipped
+                sort_value = sort_value.isoformat()
+            next_cursor = self._encode_fashion_cursor(sort_value, products[-1].id)
+        return {'products': products, 'next_cursor': next_cursor}
+
+    @api.model
+    def _fashion_fulltext_page(self, domain, search, limit, page, cursor, sort_field, direction):
+        """Fetch one page of a full-text search, ranked by relevance or in a field order"""
+        self.flush_model()
+        from_clause, where_clause, params = self._get_fashion_query_parts(domain, search)
+        if sort_field == 'relevance':
+            sort_expr = 'ts_rank_cd("product_template".fashion_search_vector, websearch_to_tsquery(%s::regconfig, %s))'
+            sort_params = [self._get_fashion_fts_config(), search]
+        elif sort_field == 'name':
+            sort_expr = """COALESCE("product_template".name->>%s, "product_template".name->>'en_US')"""
+            sort_params = [self.env.lang or 'en_US']
+        else:
+            sort_expr = f'"product_template"."{sort_field}"'
+            sort_params = []
+        operator = '>' if direction == 'asc' else '<'
+
+        seek_clause, seek_params, offset = '', [], (page - 1) * limit
+        if cursor:
+            sort_value, product_id = self._decode_fashion_cursor(cursor)
+            if sort_field == 'create_date':
+                sort_value = datetime.fromisoformat(sort_value)
+            seek_clause = f'AND ({sort_expr} {operator} %s OR ({sort_expr} = %s AND "product_template".id {operator} %s))'
+            seek_params = sort_params + [sort_value] + sort_params + [sort_value, product_id]
+            offset = 0
+
+        query = f"""
+            SELECT "product_template".id, {sort_expr} AS sort_value
+            FROM {from_clause}
+            WHERE {where_clause} {seek_clause}
+            ORDER BY sort_value {direction}, "product_template".id {direction}
+            LIMIT %s OFFSET %s
+        """
+        self.env.cr.execute(query, sort_params + list(params) + seek_params + [limit + 1, offset])
+        rows = self.env.cr.fetchall()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_next:
+            sort_value = rows[-1][1]
+            if sort_field == 'create_date':
+                # Keep the microseconds, or rows created in the same second are skipped
+                sort_value = sort_value.isoformat()
+            elif sort_field != 'name':
+                sort_value = float(sort_value)
+            next_cursor = self._encode_fashion_cursor(sort_value, rows[-1][0])
+        return {'products': self.browse([row[0] for row in rows]), 'next_cursor': next_cursor}
+
+    @api.model
+    def _fashion_count(self, domain, count_mode=None, search=None):
+        """Count products matching domain according to the configured count mode.
+
+        * ``exact``: a plain search_count
+        * ``cached``: an exact count cached until the catalog version changes
+        * ``estimate``: the row estimate of the PostgreSQL planner
+        """
+        if count_mode is None:
+            count_mode = self.env['ir.config_parameter'].sudo().get_param(
+                'fashion_ecommerce.count_mode', 'cached')
+        domain, fulltext = self._split_fashion_search(domain, search)
+        if fulltext and count_mode != 'estimate':
+            # Full-text matches depend on the term, caching them is not worth it
+            return self._get_fashion_facets(domain, fulltext)['total']
+
+        if count_mode == 'estimate':
+            from_clause, where_clause, params = self._get_fashion_query_parts(domain, fulltext)
+            self.env.cr.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {from_clause} WHERE {where_clause}", params)
+            plan = self.env.cr.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+        if count_mode == 'cached':
+            website = self.env['website'].get_current_website()
+            # Counts go through record rules, hence the user and companies in the key
+            key = (self.env.cr.dbname, website.id, self.env.lang, self.env.uid,
+                   tuple(sorted(self.env.companies.ids)), repr(domain))
+            version = get_version(self.env.cr, 'catalog')
+            count = _count_cache.get(key, version)
+            if count is None:
+                count = _count_cache.set(key, self.search_count(domain), version)
+            return count
+
+        return self.search_count(domain)
+
     def action_replenish_stock(self):
         """Action to create purchase order for stock replenishment"""
         if self.qty_available > self.min_stock_level:
@@ -102,3 +663,128 @@ class ProductTemplate(models.Model):
             },
             'target': 'new',
         }
+
+    def _plan_fashion_replenishment(self, warehouse=None, dry_run=False):
+        """Compute order quantities for many templates at once and create or update their orderpoints.
+
+        Without records, the current low-stock products are planned. Returns a report
+        with one line per template, the number of orderpoints created and updated, and
+        the time spent planning and writing.
+        """
+        started = time.perf_counter()
+        templates = self
+        if not templates:
+            rows, _cursor = self.env['stock.quant']._get_fashion_low_stock_rows()
+            templates = self.browse([row['product_id'] for row in rows])
+        warehouse = warehouse or self.env['stock.warehouse'].search([('company_id', '=', self.env.company.id)], limit=1)
+        if not warehouse:
+            raise UserError("No warehouse found for replenishment.")
+
+        # Stock in the warehouse and order quantities for the whole set in one pass
+        self.flush_model(['min_stock_level', 'max_stock_level', 'type'])
+        self.env['stock.quant'].flush_model(['product_id', 'location_id', 'quantity'])
+        self.env.cr.execute("""
+            SELECT plan.*,
+                   CASE
+                       WHEN plan.variant_id IS NULL OR plan.max_stock_level <= plan.min_stock_level THEN 'invalid'
+                       WHEN plan.on_hand > plan.min_stock_level THEN 'skip'
+                       ELSE 'order'
+                   END as action,
+                   GREATEST(plan.max_stock_level - plan.on_hand, 0) as qty_to_order
+            FROM (
+                SELECT pt.id as template_id,
+                       (SELECT MIN(pp.id) FROM product_product pp
+                        WHERE pp.product_tmpl_id = pt.id AND pp.active) as variant_id,
+                       pt.min_stock_level,
+                       pt.max_stock_level,
+                       COALESCE(stock.qty, 0) as on_hand
+                FROM product_template pt
+                LEFT JOIN (
+                    SELECT pp.product_tmpl_id, SUM(sq.quantity) as qty
+                    FROM stock_quant sq
+                    INNER JOIN stock_location sl ON sl.id = sq.location_id
+                        AND sl.usage = 'internal' AND sl.warehouse_id = %(warehouse_id)s
+                    INNER JOIN product_product pp ON pp.id = sq.product_id
+                    WHERE pp.product_tmpl_id = ANY(%(ids)s)
+                    GROUP BY pp.product_tmpl_id
+                ) stock ON stock.product_tmpl_id = pt.id
+                WHERE pt.id = ANY(%(ids)s)
+                AND pt.type = 'product'
+            ) plan
+            ORDER BY plan.template_id
+        """, {'warehouse_id': warehouse.id, 'ids': templates.ids})
+        lines = self.env.cr.dictfetchall()
+
+        Orderpoint = self.env['stock.warehouse.orderpoint'].with_context(active_test=False)
+        to_order = [line for line in lines if line['action'] == 'order']
+        existing = {
+            orderpoint.product_id.id: orderpoint
+            for orderpoint in Orderpoint.search([
+                ('product_id', 'in', [line['variant_id'] for line in to_order]),
+                ('location_id', '=', warehouse.lot_stock_id.id),
+            ])
+        }
+        to_create = []
+        to_update = defaultdict(lambda: Orderpoint.browse())
+        for line in to_order:
+            orderpoint = existing.get(line['variant_id'])
+            levels = (line['min_stock_level'], line['max_stock_level'])
+            if not orderpoint:
+                line['action'] = 'create'
+                to_create.append({
+                    'product_id': line['variant_id'],
+                    'warehouse_id': warehouse.id,
+                    'location_id': warehouse.lot_stock_id.id,
+                    'company_id': warehouse.company_id.id,
+                    'product_min_qty': levels[0],
+                    'product_max_qty': levels[1],
+                })
+            elif not orderpoint.active or (orderpoint.product_min_qty, orderpoint.product_max_qty) != levels:
+                line['action'] = 'update'
+                to_update[levels] |= orderpoint
+            else:
+                line['action'] = 'unchanged'
+        planned = time.perf_counter()
+
+        if not dry_run:
+            # One create for all new orderpoints, one write per distinct (min, max) pair
+            Orderpoint.create(to_create)
+            for (min_qty, max_qty), orderpoints in to_update.items():
+                orderpoints.write({'active': True, 'product_min_qty': min_qty, 'product_max_qty': max_qty})
+        finished = time.perf_counter()
+
+        report = {
+            'dry_run': dry_run,
+            'lines': lines,
+            'created': len(to_create),
+            'updated': sum(len(orderpoints) for orderpoints in to_update.values()),
+            'skipped': len(lines) - len(to_order),
+            'timings': {
+                'plan_ms': round((planned - started) * 1000, 1),
+                'write_ms': round((finished - planned) * 1000, 1),
+                'total_ms': round((finished - started) * 1000, 1),
+            },
+        }
+        _logger.info(
+            f"Fashion replenishment{' (dry run)' if dry_run else ''}: {len(lines)} products, "
+            f"{report['created']} created, {report['updated']} updated in {report['timings']['total_ms']} ms"
+        )
+        return report
+
+    def action_fashion_bulk_replenish(self, dry_run=False):
+        """Plan replenishment for the selected products and report the outcome"""
+        report = self._plan_fashion_replenishment(dry_run=dry_run)
+        verb = "would be" if dry_run else "were"
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': "Replenishment plan" if dry_run else "Replenishment",
+                'message': (
+                    f"{report['created']} orderpoints {verb} created and {report['updated']} updated, "
+                    f"{report['skipped']} products skipped ({report['timings']['total_ms']} ms)."
+                ),
+                'type': 'info' if dry_run else 'success',
+                'sticky': False,
+            },
+        }
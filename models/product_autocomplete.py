@@ -0,0 +1,150 @@
+from odoo import models, api
+from odoo.tools.sql import create_index
+import logging
+
+from ..tools.cache import FashionCache
+
+_logger = logging.getLogger(__name__)
+
+# Suggestions are served from this cache for a short while, keyed by
+# normalised term, website, pricelist and language
+_suggestion_cache = FashionCache(size=2048, ttl=60)
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def init(self):
+        super().init()
+        self._init_fashion_suggestions()
+
+    def _init_fashion_suggestions(self):
+        """Create the suggestion columns, the trigger maintaining them and the trigram index.
+
+        ``fashion_suggest_text`` holds the lowercased names (all translations)
+        and brand matched by autocomplete, ``fashion_suggest_payload`` the
+        compact JSON returned to the browser, so a suggestion never needs an
+        ORM record.
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'product_template' AND column_name = 'fashion_suggest_text'
+        """)
+        columns_exist = bool(cr.fetchone())
+        if not columns_exist:
+            cr.execute("""
+                ALTER TABLE product_template
+                    ADD COLUMN fashion_suggest_text text,
+                    ADD COLUMN fashion_suggest_payload jsonb
+            """)
+
+        cr.execute("""
+            CREATE OR REPLACE FUNCTION fashion_product_suggest() RETURNS trigger AS $$
+            BEGIN
+                NEW.fashion_suggest_text := lower(concat_ws(' ',
+                    (SELECT string_agg(DISTINCT value, ' ') FROM jsonb_each_text(NEW.name)),
+                    NEW.brand));
+                NEW.fashion_suggest_payload := jsonb_build_object(
+                    'id', NEW.id,
+                    'name', NEW.name,
+                    'brand', COALESCE(NEW.brand, ''),
+                    'price', NEW.list_price,
+                    'image', '/web/image/product.template/' || NEW.id || '/image_256');
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cr.execute("DROP TRIGGER IF EXISTS fashion_product_suggest_trg ON product_template")
+        cr.execute("""
+            CREATE TRIGGER fashion_product_suggest_trg
+            BEFORE INSERT OR UPDATE OF name, brand, list_price ON product_template
+            FOR EACH ROW EXECUTE FUNCTION fashion_product_suggest()
+        """)
+
+        if self._fashion_has_trigram():
+            create_index(cr, 'product_template_fashion_suggest_text_idx', 'product_template',
+                         ['fashion_suggest_text gin_trgm_ops'], method='gin')
+        else:
+            _logger.warning("pg_trgm is not available, autocomplete will not use a trigram index")
+
+        if not columns_exist:
+            self.flush_model(['name', 'brand', 'list_price'])
+            cr.execute("UPDATE product_template SET name = name")
+
+    @api.model
+    def _fashion_has_trigram(self):
+        """Return whether pg_trgm is installed, trying to install it first"""
+        cr = self.env.cr
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except Exception as e:
+            _logger.info(f"Could not create the pg_trgm extension: {str(e)}")
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return bool(cr.fetchone())
+
+    @api.model
+    def _get_fashion_suggestions(self, term, website_id=None, pricelist=None, limit=10):
+        """Return autocomplete suggestions for term.
+
+        Results are ranked with names or brands starting with the term first,
+        then words starting with it, then trigram similarity, and cached per
+        worker so repeated prefixes do not reach the database.
+        """
+        term = ' '.join((term or '').lower().split())
+        if len(term) < 2:
+            return []
+
+        # Suggestions go through record rules, hence the user and companies in the key
+        key = (self.env.cr.dbname, website_id, pricelist.id if pricelist else None, self.env.lang,
+               self.env.uid, tuple(sorted(self.env.companies.ids)), term)
+        suggestions = _suggestion_cache.get(key)
+        if suggestions is None:
+            suggestions = _suggestion_cache.set(key, self._fetch_fashion_suggestions(term, pricelist, limit))
+        return suggestions
+
+    @api.model
+    def _fetch_fashion_suggestions(self, term, pricelist, limit):
+        """Read the suggestion payloads matching term in a single indexed query"""
+        self.flush_model(['name', 'brand', 'list_price'])
+        from_clause, where_clause, params = self._get_fashion_query_parts(self._get_fashion_base_domain())
+        pattern = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+        match_clause = '"product_template".fashion_suggest_text LIKE %s'
+        match_params = [f'%{pattern}%']
+        similarity_order, similarity_params = '', []
+        if self.env.registry.has_trigram:
+            match_clause = f'({match_clause} OR %s <%% "product_template".fashion_suggest_text)'
+            match_params.append(term)
+            similarity_order = 'word_similarity(%s, "product_template".fashion_suggest_text) DESC,'
+            similarity_params = [term]
+
+        query = f"""
+            SELECT "product_template".fashion_suggest_payload
+            FROM {from_clause}
+            WHERE {where_clause} AND {match_clause}
+            ORDER BY "product_template".fashion_suggest_text LIKE %s DESC,
+                     ' ' || "product_template".fashion_suggest_text LIKE %s DESC,
+                     {similarity_order}
+                     "product_template".id
+            LIMIT %s
+        """
+        self.env.cr.execute(query, list(params) + match_params + [
+            f'{pattern}%', f'% {pattern}%',
+        ] + similarity_params + [limit])
+        payloads = [row[0] for row in self.env.cr.fetchall()]
+
+        prices = {}
+        if pricelist and payloads:
+            products = self.browse([payload['id'] for payload in payloads])
+            prices = pricelist._get_products_price(products, 1.0)
+
+        lang = self.env.lang or 'en_US'
+        return [{
+            'id': payload['id'],
+            'name': (payload['name'] or {}).get(lang) or (payload['name'] or {}).get('en_US', ''),
+            'brand': payload['brand'],
+            'price': prices.get(payload['id'], payload['price']),
+            'image': payload['image'],
+        } for payload in payloads]
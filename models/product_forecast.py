@@ -0,0 +1,164 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import math
+import time
+
+from .product import FASHION_STOCK_STATUS_SQL
+from ..tools.cache import bump_version_on_commit
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+# Week-of-history columns are oldest first; one year of history enables seasonality
+FORECAST_DEFAULTS = {
+    'history_weeks': 52,
+    'lead_days': 14,
+    'coverage_days': 30,
+    'service_z': 1.65,
+    'alpha': 0.3,
+    'moving_average_weeks': 4,
+}
+FORECAST_WRITE_CHUNK = 1000
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    @api.model
+    def _get_fashion_forecast_settings(self):
+        """Read forecasting settings from system parameters, falling back to defaults"""
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        settings = {}
+        for key, default in FORECAST_DEFAULTS.items():
+            try:
+                settings[key] = type(default)(get_param(f'fashion_ecommerce.forecast_{key}', default))
+            except (TypeError, ValueError):
+                settings[key] = default
+        return settings
+
+    @api.model
+    def _get_fashion_demand_history(self, history_weeks):
+        """Return (template ids, audiences, seasons, weekly demand matrix) from confirmed sales.
+
+        One query aggregates sold quantities per template and week, converted to
+        the template's unit of measure; templates without sales are left out.
+        """
+        end = fields.Datetime.now()
+        self.env['sale.order.line'].flush_model(['product_id', 'product_uom_qty', 'product_uom', 'order_id'])
+        self.env['sale.order'].flush_model(['state', 'date_order'])
+        self.env.cr.execute("""
+            SELECT pt.id,
+                   pt.target_audience,
+                   COALESCE(pt.season, 'all_season'),
+                   FLOOR(EXTRACT(EPOCH FROM (%(end)s - so.date_order)) / 604800)::int as weeks_ago,
+                   SUM(sol.product_uom_qty / line_uom.factor * template_uom.factor) as qty
+            FROM sale_order_line sol
+            INNER JOIN sale_order so ON so.id = sol.order_id
+            INNER JOIN product_product pp ON pp.id = sol.product_id
+            INNER JOIN product_template pt ON pt.id = pp.product_tmpl_id
+            INNER JOIN uom_uom line_uom ON line_uom.id = sol.product_uom
+            INNER JOIN uom_uom template_uom ON template_uom.id = pt.uom_id
+            WHERE so.state IN ('sale', 'done')
+            AND so.date_order >= %(start)s AND so.date_order < %(end)s
+            AND pt.target_audience IS NOT NULL
+            AND pt.type = 'product'
+            GROUP BY pt.id, weeks_ago
+        """, {'start': end - timedelta(weeks=history_weeks), 'end': end})
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return [], np.array([]), np.array([]), np.zeros((0, history_weeks))
+
+        template_ids, audiences, seasons, weeks_ago, quantities = zip(*rows)
+        ids, row_index = np.unique(np.array(template_ids), return_inverse=True)
+        columns = history_weeks - 1 - np.clip(np.array(weeks_ago), 0, history_weeks - 1)
+        demand = np.zeros((len(ids), history_weeks))
+        np.add.at(demand, (row_index, columns), np.array(quantities, dtype=float))
+
+        # Audience and season are constant per template, any of its rows will do
+        first = np.zeros(len(ids), dtype=int)
+        first[row_index] = np.arange(len(rows))
+        return ids.tolist(), np.array(audiences)[first], np.array(seasons)[first], demand
+
+    @api.model
+    def _compute_fashion_stock_levels(self, demand, audiences, seasons, settings):
+        """Compute suggested (min, max) stock levels for every row of a weekly demand matrix.
+
+        The weekly forecast averages a short moving average with simple exponential
+        smoothing, scaled by the seasonality of the product's audience and season
+        group; safety stock covers demand variability over the lead time.
+        """
+        weeks = demand.shape[1]
+        lead_weeks = settings['lead_days'] / 7.0
+        coverage_weeks = settings['coverage_days'] / 7.0
+
+        moving_average = demand[:, -settings['moving_average_weeks']:].mean(axis=1)
+        # Smoothing runs over the weeks, each step vectorised over the whole catalog
+        level = demand[:, 0].copy()
+        for week in range(1, weeks):
+            level = settings['alpha'] * demand[:, week] + (1 - settings['alpha']) * level
+        forecast = (moving_average + level) / 2
+
+        # Seasonal index per (audience, season): demand in the coming weeks one
+        # year ago relative to the group's average week
+        seasonality = np.ones(len(demand))
+        horizon = max(1, math.ceil(lead_weeks + coverage_weeks))
+        if weeks >= 52 and horizon < weeks:
+            groups, group_index = np.unique(
+                np.char.add(np.char.add(audiences.astype(str), '/'), seasons.astype(str)),
+                return_inverse=True,
+            )
+            group_total = np.bincount(group_index, weights=demand.sum(axis=1), minlength=len(groups))
+            group_horizon = np.bincount(group_index, weights=demand[:, :horizon].sum(axis=1), minlength=len(groups))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                index = np.where(group_total > 0, (group_horizon / horizon) / (group_total / weeks), 1.0)
+            seasonality = np.clip(index, 0.5, 2.0)[group_index]
+
+        weekly = forecast * seasonality
+        safety_stock = settings['service_z'] * demand.std(axis=1) * math.sqrt(lead_weeks)
+        min_levels = np.ceil(weekly * lead_weeks + safety_stock)
+        max_levels = np.maximum(np.ceil(min_levels + weekly * coverage_weeks), min_levels + 1)
+        return min_levels, max_levels
+
+    @api.model
+    def _write_fashion_stock_levels(self, template_ids, min_levels, max_levels):
+        """Write stock levels and the resulting stock status in chunked bulk updates"""
+        for start in range(0, len(template_ids), FORECAST_WRITE_CHUNK):
+            chunk = slice(start, start + FORECAST_WRITE_CHUNK)
+            self.env.cr.execute(f"""
+                UPDATE product_template pt
+                SET min_stock_level = d.min_level,
+                    max_stock_level = d.max_level,
+                    stock_status = {FASHION_STOCK_STATUS_SQL.format(qty='pt.fashion_qty_on_hand', min='d.min_level')}
+                FROM unnest(%s::int[], %s::float8[], %s::float8[]) AS d(id, min_level, max_level)
+                WHERE pt.id = d.id
+            """, [template_ids[chunk], min_levels[chunk].tolist(), max_levels[chunk].tolist()])
+        self.invalidate_model(['min_stock_level', 'max_stock_level', 'stock_status'])
+        bump_version_on_commit(self.env.cr, 'stock')
+
+    @api.model
+    def _cron_fashion_forecast_stock_levels(self):
+        """Nightly job setting min/max stock levels from forecast demand"""
+        if np is None:
+            _logger.warning("Fashion demand forecasting requires numpy, skipping")
+            return False
+
+        start = time.perf_counter()
+        self.flush_model(['fashion_qty_on_hand'])
+        settings = self._get_fashion_forecast_settings()
+        template_ids, audiences, seasons, demand = self._get_fashion_demand_history(settings['history_weeks'])
+        if not template_ids:
+            _logger.info("Fashion demand forecasting: no sales history")
+            return True
+
+        min_levels, max_levels = self._compute_fashion_stock_levels(demand, audiences, seasons, settings)
+        self._write_fashion_stock_levels(template_ids, min_levels, max_levels)
+        _logger.info(
+            f"Fashion demand forecasting: updated {len(template_ids)} products "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return True
@@ -1,6 +1,8 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 
+from ..tools.cache import bump_version_on_commit
+
 class FashionProductReview(models.Model):
     _name = 'fashion.product.review'
     _description = 'Fashion Product Review'
@@ -47,8 +49,19 @@ class FashionProductReview(models.Model):
             if purchase_lines:
                 vals['verified_purchase'] = True
         
+        # Review stats feed the rating facet of the cached filter options
+        bump_version_on_commit(self.env.cr, 'catalog')
         return super().create(vals)
     
+    def write(self, vals):
+        if 'state' in vals or 'rating' in vals:
+            bump_version_on_commit(self.env.cr, 'catalog')
+        return super().write(vals)
+    
+    def unlink(self):
+        bump_version_on_commit(self.env.cr, 'catalog')
+        return super().unlink()
+    
     def action_publish(self):
         """Publish the review"""
         self.state = 'published'
@@ -0,0 +1,112 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class FashionStockHold(models.Model):
+    _name = 'fashion.stock.hold'
+    _description = 'Fashion Cart Stock Hold'
+    _rec_name = 'product_id'
+    # Holds are short-lived and written on every cart change, keep rows compact
+    _log_access = False
+
+    order_id = fields.Many2one('sale.order', string='Order', required=True, ondelete='cascade')
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    quantity = fields.Float(string='Quantity', required=True)
+    expires_at = fields.Datetime(string='Expires At', required=True)
+
+    _sql_constraints = [
+        ('unique_order_product', 'unique(order_id, product_id)',
+         'A cart can only hold a product once!')
+    ]
+
+    def init(self):
+        # Active holds per product are summed from the index alone
+        create_index(self.env.cr, 'fashion_stock_hold_product_expires_idx', self._table,
+                     ['product_id', 'expires_at', 'quantity'])
+
+    @api.model
+    def _get_hold_ttl(self):
+        """Return the lifetime of a cart hold"""
+        minutes = self.env['ir.config_parameter'].sudo().get_param('fashion_ecommerce.cart_hold_minutes', 15)
+        try:
+            return timedelta(minutes=float(minutes))
+        except (TypeError, ValueError):
+            return timedelta(minutes=15)
+
+    @api.model
+    def _get_held_quantities(self, product_ids, exclude_orders=None):
+        """Return {product id: quantity held by active holds}, ignoring holds of exclude_orders"""
+        if not product_ids:
+            return {}
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT product_id, SUM(quantity)
+            FROM fashion_stock_hold
+            WHERE product_id = ANY(%s)
+            AND expires_at > %s
+            AND order_id != ALL(%s)
+            GROUP BY product_id
+        """, [list(product_ids), fields.Datetime.now(), exclude_orders.ids if exclude_orders else []])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _get_available_to_sell(self, products, exclude_orders=None):
+        """Return {product: unreserved quantity in internal locations minus the holds of other carts}"""
+        # Reserved stock belongs to confirmed orders whose holds were released
+        unreserved = {
+            product: quantity - reserved
+            for product, quantity, reserved in self.env['stock.quant'].sudo()._read_group(
+                [('product_id', 'in', products.ids), ('location_id.usage', '=', 'internal')],
+                ['product_id'], ['quantity:sum', 'reserved_quantity:sum'],
+            )
+        }
+        held = self._get_held_quantities(products.ids, exclude_orders)
+        return {
+            product: unreserved.get(product, 0.0) - held.get(product.id, 0.0)
+            for product in products
+        }
+
+    @api.model
+    def _hold(self, order, product, quantity):
+        """Place or update the hold of order on product and extend the other holds of the cart"""
+        self._hold_many(order, {product: quantity})
+
+    @api.model
+    def _hold_many(self, order, quantities):
+        """Set the holds of order from {product: quantity} in one statement and extend the others"""
+        expires_at = fields.Datetime.now() + self._get_hold_ttl()
+        cr = self.env.cr
+        kept = {product.id: quantity for product, quantity in quantities.items() if quantity > 0}
+        released = [product.id for product, quantity in quantities.items() if quantity <= 0]
+        if kept:
+            cr.execute("""
+                INSERT INTO fashion_stock_hold (order_id, product_id, quantity, expires_at)
+                SELECT %s, product_id, quantity, %s
+                FROM unnest(%s::int[], %s::float8[]) AS h(product_id, quantity)
+                ON CONFLICT (order_id, product_id)
+                DO UPDATE SET quantity = EXCLUDED.quantity, expires_at = EXCLUDED.expires_at
+            """, [order.id, expires_at, list(kept), list(kept.values())])
+        if released:
+            cr.execute("DELETE FROM fashion_stock_hold WHERE order_id = %s AND product_id = ANY(%s)",
+                       [order.id, released])
+        # An active cart keeps all of its holds alive
+        cr.execute("UPDATE fashion_stock_hold SET expires_at = %s WHERE order_id = %s AND expires_at < %s",
+                   [expires_at, order.id, expires_at])
+        self.invalidate_model()
+
+    @api.model
+    def _release_orders(self, orders):
+        """Drop the holds of orders, e.g. once they are confirmed"""
+        self.env.cr.execute("DELETE FROM fashion_stock_hold WHERE order_id = ANY(%s)", [orders.ids])
+        self.invalidate_model()
+
+    @api.model
+    def _cron_reap_expired_holds(self):
+        """Delete expired holds in bulk"""
+        self.env.cr.execute("DELETE FROM fashion_stock_hold WHERE expires_at <= %s", [fields.Datetime.now()])
+        if self.env.cr.rowcount:
+            _logger.info(f"Reaped {self.env.cr.rowcount} expired cart holds")
+        self.invalidate_model()
@@ -0,0 +1,108 @@
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import json
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+TRACKING_IMPORT_CHUNK = 5000
+
+class FashionTrackingImport(models.TransientModel):
+    _name = 'fashion.tracking.import'
+    _description = 'Fashion Carrier Tracking Import'
+
+    file = fields.Binary(string='File', required=True)
+    filename = fields.Char(string='Filename')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines')
+    ], string='Format', default='csv', required=True,
+        help="CSV with order,tracking_number columns, or one JSON object per line with the same keys")
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    result = fields.Text(string='Result', readonly=True)
+
+    @api.onchange('filename')
+    def _onchange_filename(self):
+        if self.filename and self.filename.lower().endswith(('.jsonl', '.ndjson')):
+            self.file_format = 'jsonl'
+
+    def _iter_rows(self):
+        """Yield (order reference, tracking number) pairs from the uploaded file"""
+        text = io.StringIO(base64.b64decode(self.file).decode('utf-8-sig'))
+        if self.file_format == 'jsonl':
+            for line in text:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get('order'), record.get('tracking_number')
+        else:
+            for record in csv.DictReader(text):
+                yield record.get('order'), record.get('tracking_number')
+
+    def _apply_chunk(self, names, tracking_numbers):
+        """Set tracking numbers for one chunk with a single UPDATE; return the updated order names.
+
+        Rows whose tracking number is already used by another order are skipped
+        so that the unique tracking index never aborts the import.
+        """
+        self.env.cr.execute("""
+            UPDATE sale_order so
+            SET tracking_number = v.tracking_number,
+                write_uid = %s,
+                write_date = NOW() AT TIME ZONE 'UTC'
+            FROM unnest(%s::varchar[], %s::varchar[]) AS v(name, tracking_number)
+            WHERE so.name = v.name
+            AND so.tracking_number IS DISTINCT FROM v.tracking_number
+            AND NOT EXISTS (
+                SELECT 1 FROM sale_order other
+                WHERE other.tracking_number = v.tracking_number AND other.id != so.id
+            )
+            RETURNING so.name
+        """, [self.env.uid, names, tracking_numbers])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    def action_import(self):
+        """Apply the carrier file in chunks of set-based updates"""
+        self.ensure_one()
+        start = time.perf_counter()
+        self.env['sale.order'].flush_model(['tracking_number'])
+
+        # Later rows win for an order; a tracking number may only go to one order
+        tracking_by_order, order_by_tracking, invalid = {}, {}, 0
+        try:
+            for name, tracking_number in self._iter_rows():
+                name, tracking_number = (name or '').strip(), (tracking_number or '').strip()
+                if not name or len(tracking_number) < 5 or order_by_tracking.get(tracking_number, name) != name:
+                    invalid += 1
+                    continue
+                tracking_by_order[name] = tracking_number
+                order_by_tracking[tracking_number] = name
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            raise UserError(f"Could not read the tracking file: {str(e)}") from e
+
+        names = list(tracking_by_order)
+        updated = set()
+        for offset in range(0, len(names), TRACKING_IMPORT_CHUNK):
+            chunk = names[offset:offset + TRACKING_IMPORT_CHUNK]
+            updated |= self._apply_chunk(chunk, [tracking_by_order[name] for name in chunk])
+        self.env['sale.order'].invalidate_model(['tracking_number', 'write_uid', 'write_date'])
+
+        duration = time.perf_counter() - start
+        self.write({
+            'state': 'done',
+            'result': (
+                f"{len(updated)} orders updated, {len(names) - len(updated)} unchanged, unknown or conflicting, "
+                f"{invalid} invalid rows skipped in {duration:.2f}s."
+            ),
+        })
+        _logger.info(f"Tracking import: {len(updated)} of {len(names)} orders updated in {duration:.2f}s")
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -1,5 +1,19 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
+from collections import defaultdict
+import logging
+import threading
+
+from ..tools.cache import FashionCache, ensure_version_counter, version_sequence
+
+_logger = logging.getLogger(__name__)
+
+# Product fields copied to wishlist rows
+WISHLIST_PRODUCT_FIELDS = {'name', 'list_price', 'brand'}
+
+# Wishlisted template ids per partner, stamped with the partner's wishlist version
+_membership_cache = FashionCache(size=4096)
 
 class FashionWishlist(models.Model):
     _name = 'fashion.wishlist'
@@ -11,37 +25,137 @@ class FashionWishlist(models.Model):
     product_id = fields.Many2one('product.template', string='Product', required=True, ondelete='cascade')
     date_added = fields.Datetime(string='Date Added', default=fields.Datetime.now)
     
-    # Product details for quick access
-    product_name = fields.Char(related='product_id.name', store=True)
-    product_price = fields.Float(related='product_id.list_price', store=True)
-    product_brand = fields.Char(related='product_id.brand', store=True)
-    product_image = fields.Image(related='product_id.image_1920')
+    # Product details for quick access, copied from the product by set-based
+    # refreshes instead of stored related fields (see _schedule_product_refresh)
+    product_name = fields.Char(string='Product Name', translate=True, readonly=True)
+    product_price = fields.Float(string='Product Price', readonly=True)
+    product_brand = fields.Char(string='Product Brand', readonly=True)
+    product_image = fields.Image(related='product_id.image_128')
     
     _sql_constraints = [
         ('unique_partner_product', 'unique(partner_id, product_id)', 
          'Product already exists in wishlist!')
     ]
     
+    def init(self):
+        # Wishlist version per partner, drawn from the 'wishlist' sequence so a
+        # rolled back bump can never be reused for different contents
+        ensure_version_counter(self.env.cr, 'wishlist')
+        self.env.cr.execute("""
+            CREATE TABLE IF NOT EXISTS fashion_wishlist_version (
+                partner_id integer PRIMARY KEY,
+                version bigint NOT NULL
+            )
+        """)
+        # Finds the wishlists of changed products without touching the table
+        create_index(self.env.cr, 'fashion_wishlist_product_partner_idx', self._table, ['product_id', 'partner_id'])
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        items = super().create(vals_list)
+        self._refresh_product_details(items.product_id.ids)
+        self._bump_partner_versions(items.partner_id.ids)
+        return items
+    
+    def write(self, vals):
+        partner_ids = set(self.partner_id.ids) if {'partner_id', 'product_id'}.intersection(vals) else set()
+        result = super().write(vals)
+        if partner_ids:
+            self._bump_partner_versions(partner_ids | set(self.partner_id.ids))
+        return result
+    
+    def unlink(self):
+        partner_ids = self.partner_id.ids
+        result = super().unlink()
+        self._bump_partner_versions(partner_ids)
+        return result
+    
+    @api.model
+    def _bump_partner_versions(self, partner_ids):
+        """Give the wishlists of partner_ids a new version, visible to other workers once committed"""
+        if not partner_ids:
+            return
+        self.env.cr.execute(f"""
+            INSERT INTO fashion_wishlist_version (partner_id, version)
+            SELECT partner_id, nextval('{version_sequence('wishlist')}')
+            FROM unnest(%s::int[]) AS p(partner_id)
+            ON CONFLICT (partner_id) DO UPDATE SET version = EXCLUDED.version
+        """, [sorted(set(partner_ids))])
+    
+    @api.model
+    def _get_partner_version(self, partner_id):
+        self.env.cr.execute("SELECT version FROM fashion_wishlist_version WHERE partner_id = %s", [partner_id])
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+    
     @api.model
     def toggle_wishlist(self, product_id, partner_id=None):
         """Add or remove product from wishlist"""
         if not partner_id:
             partner_id = self.env.user.partner_id.id
-            
-        existing = self.search([
-            ('partner_id', '=', partner_id),
-            ('product_id', '=', product_id)
-        ])
+        self.check_access_rights('create')
+        self.check_access_rights('unlink')
+        
+        # Delete the row if it exists, insert it otherwise, in one statement;
+        # a concurrent insert of the same row is absorbed by ON CONFLICT
+        self.flush_model()
+        self.env.cr.execute("""
+            WITH deleted AS (
+                DELETE FROM fashion_wishlist
+                WHERE partner_id = %(partner)s AND product_id = %(product)s
+                RETURNING id
+            ), inserted AS (
+                INSERT INTO fashion_wishlist (partner_id, product_id, date_added,
+                                              product_name, product_price, product_brand,
+                                              create_uid, create_date, write_uid, write_date)
+                SELECT %(partner)s, pt.id, %(now)s, pt.name, pt.list_price, pt.brand,
+                       %(uid)s, %(now)s, %(uid)s, %(now)s
+                FROM product_template pt
+                WHERE pt.id = %(product)s AND NOT EXISTS (SELECT 1 FROM deleted)
+                ON CONFLICT (partner_id, product_id) DO NOTHING
+                RETURNING id
+            )
+            SELECT (SELECT COUNT(*) FROM deleted), (SELECT COUNT(*) FROM inserted)
+        """, {'partner': partner_id, 'product': product_id, 'now': fields.Datetime.now(), 'uid': self.env.uid})
+        deleted, inserted = self.env.cr.fetchone()
+        self.invalidate_model()
+        if deleted or inserted:
+            self._bump_partner_versions([partner_id])
         
-        if existing:
-            existing.unlink()
+        if deleted:
             return {'action': 'removed', 'in_wishlist': False}
-        else:
-            self.create({
-                'partner_id': partner_id,
-                'product_id': product_id
-            })
-            return {'action': 'added', 'in_wishlist': True}
+        if not inserted:
+            # Neither deleted nor inserted: the product does not exist, or a
+            # concurrent request added it first
+            self.env.cr.execute("SELECT 1 FROM product_template WHERE id = %s", [product_id])
+            if not self.env.cr.fetchone():
+                raise ValidationError("Product not found")
+        return {'action': 'added', 'in_wishlist': True}
+    
+    @api.model
+    def _get_wishlisted_product_ids(self, partner_id):
+        """Return the set of template ids in the wishlist of partner, cached until that wishlist changes"""
+        key = (self.env.cr.dbname, partner_id)
+        version = self._get_partner_version(partner_id)
+        product_ids = _membership_cache.get(key, version)
+        if product_ids is None:
+            self.flush_model(['partner_id', 'product_id'])
+            # Served by the (partner_id, product_id) unique index alone
+            self.env.cr.execute("SELECT product_id FROM fashion_wishlist WHERE partner_id = %s", [partner_id])
+            product_ids = _membership_cache.set(key, frozenset(row[0] for row in self.env.cr.fetchall()), version)
+        return product_ids
+    
+    @api.model
+    def get_wishlist_status(self, product_ids, partner_id=None):
+        """Return which of product_ids are wishlisted by partner, and the wishlist size"""
+        if not partner_id:
+            partner_id = self.env.user.partner_id.id
+        self.check_access_rights('read')
+        wishlisted = self._get_wishlisted_product_ids(partner_id)
+        return {
+            'wishlisted': [product_id for product_id in product_ids if product_id in wishlisted],
+            'count': len(wishlisted),
+        }
     
     @api.model
     def get_wishlist_products(self, partner_id=None):
@@ -50,4 +164,166 @@ class FashionWishlist(models.Model):
             partner_id = self.env.user.partner_id.id
             
         wishlist_items = self.search([('partner_id', '=', partner_id)])
-        return wishlist_items.mapped('product_id')
\ No newline at end of file
+        return wishlist_items.mapped('product_id')
+    
+    @api.model
+    def _get_wishlist_page(self, partner_id, page=1, limit=24):
+        """Return one page of the wishlist of partner, read in a single query.
+
+        Only the columns the page shows are selected; images are referenced by
+        the URL of the product's 256px thumbnail, never loaded.
+        """
+        self.check_access_rights('read')
+        self.flush_model(['partner_id', 'product_id', 'date_added', 'product_name', 'product_price', 'product_brand'])
+        self.env['product.template'].flush_model(['write_date'])
+        self.env.cr.execute("""
+            SELECT w.id,
+                   w.product_id,
+                   COALESCE(w.product_name->>%s, w.product_name->>'en_US') AS name,
+                   w.product_brand AS brand,
+                   w.product_price AS price,
+                   (SELECT pp.id FROM product_product pp
+                    WHERE pp.product_tmpl_id = w.product_id AND pp.active
+                    ORDER BY pp.id LIMIT 1) AS variant_id,
+                   pt.write_date,
+                   COUNT(*) OVER () AS total
+            FROM fashion_wishlist w
+            JOIN product_template pt ON pt.id = w.product_id
+            WHERE w.partner_id = %s
+            ORDER BY w.date_added DESC, w.id DESC
+            LIMIT %s OFFSET %s
+        """, [self.env.lang or 'en_US', partner_id, limit, (page - 1) * limit])
+        items = self.env.cr.dictfetchall()
+
+        total = items[0]['total'] if items else 0
+        for item in items:
+            unique = item['write_date'].strftime('%Y%m%d%H%M%S') if item['write_date'] else ''
+            item['image_url'] = f"/web/image/product.template/{item['product_id']}/image_256?unique={unique}"
+        return {
+            'items': items,
+            'total': total,
+            'page': page,
+            'pages': max(1, -(-total // limit)),
+        }
+
+    @api.model
+    def _get_sync_mode(self):
+        """Return how product changes reach wishlist rows: 'immediate' or 'lazy'"""
+        mode = self.env['ir.config_parameter'].sudo().get_param('fashion_ecommerce.wishlist_sync_mode', 'immediate')
+        return mode if mode in ('immediate', 'lazy') else 'immediate'
+    
+    @api.model
+    def _refresh_product_details(self, product_ids):
+        """Copy name, price and brand of products to their wishlist rows in one UPDATE.
+
+        Only rows that actually differ are written; names are copied with all
+        their translations.
+        """
+        if not product_ids:
+            return 0
+        self.env['product.template'].flush_model(['name', 'list_price', 'brand'])
+        self.flush_model(['product_id', 'product_name', 'product_price', 'product_brand'])
+        self.env.cr.execute("""
+            UPDATE fashion_wishlist w
+            SET product_name = pt.name,
+                product_price = pt.list_price,
+                product_brand = pt.brand
+            FROM product_template pt
+            WHERE w.product_id = pt.id
+            AND pt.id = ANY(%s)
+            AND (w.product_name IS DISTINCT FROM pt.name
+                 OR w.product_price IS DISTINCT FROM pt.list_price
+                 OR w.product_brand IS DISTINCT FROM pt.brand)
+        """, [list(product_ids)])
+        updated = self.env.cr.rowcount
+        self.invalidate_model(['product_name', 'product_price', 'product_brand'])
+        return updated
+    
+    @api.model
+    def _schedule_product_refresh(self, product_ids):
+        """Propagate product changes now, or queue them for the background refresh in lazy mode"""
+        if not product_ids:
+            return
+        if self._get_sync_mode() == 'immediate':
+            self._refresh_product_details(product_ids)
+            return
+        self.env.cr.execute("""
+            INSERT INTO fashion_wishlist_refresh (product_id)
+            SELECT unnest(%s::int[])
+            ON CONFLICT (product_id) DO NOTHING
+        """, [list(product_ids)])
+        cron = self.env.ref('fashion_ecommerce.ir_cron_fashion_wishlist_refresh', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+    
+    @api.model
+    def _cron_refresh_product_details(self, batch_size=500, max_batches=50):
+        """Refresh the wishlist rows of queued products, one committed chunk at a time"""
+        testing = getattr(threading.current_thread(), 'testing', False)
+        for _batch in range(max_batches):
+            self.env.cr.execute("""
+                DELETE FROM fashion_wishlist_refresh
+                WHERE id IN (
+                    SELECT id FROM fashion_wishlist_refresh
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING product_id
+            """, [batch_size])
+            product_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not product_ids:
+                break
+            updated = self._refresh_product_details(product_ids)
+            _logger.info(f"Wishlist refresh: {len(product_ids)} products, {updated} rows updated")
+            if not testing:
+                self.env.cr.commit()
+
+
+class FashionWishlistRefresh(models.Model):
+    _name = 'fashion.wishlist.refresh'
+    _description = 'Fashion Wishlist Pending Product Refresh'
+    _log_access = False
+
+    product_id = fields.Many2one('product.template', string='Product', required=True, ondelete='cascade')
+
+    _sql_constraints = [
+        ('unique_product', 'unique(product_id)', 'A product is queued for refresh only once!')
+    ]
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        old_prices = {product.id: product.list_price for product in self} if 'list_price' in vals else {}
+        result = super().write(vals)
+        if WISHLIST_PRODUCT_FIELDS.intersection(vals) and not self.env.context.get('fashion_defer_wishlist_sync'):
+            self.env['fashion.wishlist']._schedule_product_refresh(self.ids)
+        if old_prices:
+            self.env['fashion.wishlist.event']._enqueue_price_drops([
+                (product.id, old_prices[product.id], product.list_price)
+                for product in self
+                if product.list_price < old_prices[product.id]
+            ])
+        return result
+
+    @api.model
+    def _fashion_bulk_update(self, updates):
+        """Apply {template id: vals} with one write per distinct vals and deferred dependent work.
+
+        Meant for imports: stored computes are flushed once at the end instead
+        of after every write, and wishlist rows are refreshed once for all
+        updated products.
+        """
+        groups = defaultdict(list)
+        for template_id, vals in updates.items():
+            groups[tuple(sorted(vals.items()))].append(template_id)
+        deferred = self.with_context(fashion_defer_wishlist_sync=True)
+        for vals, template_ids in groups.items():
+            deferred.browse(template_ids).write(dict(vals))
+        self.env.flush_all()
+        changed = {field_name for vals in updates.values() for field_name in vals}
+        if WISHLIST_PRODUCT_FIELDS.intersection(changed):
+            self.env['fashion.wishlist']._schedule_product_refresh(list(updates))
+        return len(groups)
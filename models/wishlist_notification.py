@@ -0,0 +1,183 @@
+from odoo import models, fields, api
+from collections import defaultdict
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Digest mails created per ORM call while fanning out a batch of events
+WISHLIST_MAIL_CHUNK = 500
+
+class FashionWishlistEvent(models.Model):
+    _name = 'fashion.wishlist.event'
+    _description = 'Fashion Wishlist Product Event'
+    _order = 'id'
+    _log_access = False
+
+    product_id = fields.Many2one('product.template', string='Product', required=True, ondelete='cascade')
+    event_type = fields.Selection([
+        ('back_in_stock', 'Back in Stock'),
+        ('price_drop', 'Price Drop')
+    ], string='Event', required=True)
+    old_price = fields.Float(string='Old Price')
+    new_price = fields.Float(string='New Price')
+    created_at = fields.Datetime(string='Created At', default=fields.Datetime.now, required=True)
+
+    @api.model
+    def _enqueue(self, rows):
+        """Queue (product id, event type, old price, new price) rows and wake the sender up.
+
+        Called from stock moves and price writes: only the event rows are
+        written there, the wishlist fan-out and the mails happen in the cron.
+        """
+        if not rows:
+            return
+        product_ids, event_types, old_prices, new_prices = zip(*rows)
+        self.env.cr.execute("""
+            INSERT INTO fashion_wishlist_event (product_id, event_type, old_price, new_price, created_at)
+            SELECT e.product_id, e.event_type, e.old_price, e.new_price, %s
+            FROM unnest(%s::int[], %s::varchar[], %s::float8[], %s::float8[])
+                AS e(product_id, event_type, old_price, new_price)
+            WHERE EXISTS (SELECT 1 FROM fashion_wishlist w WHERE w.product_id = e.product_id)
+        """, [fields.Datetime.now(), list(product_ids), list(event_types), list(old_prices), list(new_prices)])
+        if self.env.cr.rowcount:
+            cron = self.env.ref('fashion_ecommerce.ir_cron_fashion_wishlist_notify', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+
+    @api.model
+    def _enqueue_back_in_stock(self, product_ids):
+        """Queue restock events for templates whose on-hand quantity became positive"""
+        self._enqueue([(product_id, 'back_in_stock', None, None) for product_id in product_ids])
+
+    @api.model
+    def _enqueue_price_drops(self, drops):
+        """Queue price drop events for (template id, old price, new price) triples"""
+        self._enqueue([(product_id, 'price_drop', old, new) for product_id, old, new in drops])
+
+    @api.model
+    def _claim_events(self, batch_size):
+        """Consume a batch of events and collapse them per product.
+
+        Returns {template id: {event type: (old price, new price)}}; repeated
+        price drops keep the oldest old price and the latest new price.
+        """
+        self.env.cr.execute("""
+            DELETE FROM fashion_wishlist_event
+            WHERE id IN (
+                SELECT id FROM fashion_wishlist_event
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, product_id, event_type, old_price, new_price
+        """, [batch_size])
+        events = defaultdict(dict)
+        for _id, product_id, event_type, old_price, new_price in sorted(self.env.cr.fetchall()):
+            previous = events[product_id].get(event_type)
+            events[product_id][event_type] = (previous[0] if previous else old_price, new_price)
+        return events
+
+    @api.model
+    def _filter_current_events(self, events):
+        """Drop events the product no longer matches: sold out again, or price back up"""
+        products = self.env['product.template'].browse(list(events)).exists()
+        current = {}
+        for product in products:
+            kept = {}
+            if 'back_in_stock' in events[product.id] and product.fashion_qty_on_hand > 0:
+                kept['back_in_stock'] = events[product.id]['back_in_stock']
+            price_drop = events[product.id].get('price_drop')
+            if price_drop and product.list_price < price_drop[0]:
+                kept['price_drop'] = (price_drop[0], product.list_price)
+            if kept and product.active:
+                current[product.id] = kept
+        return current
+
+    @api.model
+    def _get_subscribers(self, product_ids):
+        """Return {partner id: [template ids]} of reachable partners wishlisting any of product_ids.
+
+        One query per batch, served by the (product_id, partner_id) index of
+        fashion_wishlist.
+        """
+        self.env['fashion.wishlist'].flush_model(['partner_id', 'product_id'])
+        self.env.cr.execute("""
+            SELECT w.partner_id, w.product_id
+            FROM fashion_wishlist w
+            JOIN res_partner p ON p.id = w.partner_id
+            WHERE w.product_id = ANY(%s)
+            AND p.active AND p.email IS NOT NULL AND p.email != ''
+            ORDER BY w.partner_id, w.product_id
+        """, [list(product_ids)])
+        subscribers = defaultdict(list)
+        for partner_id, product_id in self.env.cr.fetchall():
+            subscribers[partner_id].append(product_id)
+        return subscribers
+
+    @api.model
+    def _prepare_digest_mails(self, events, subscribers):
+        """Render one digest mail per partner, products named in the partner's language"""
+        company = self.env.company
+        email_from = company.email_formatted or self.env.user.email_formatted
+        base_url = self.get_base_url()
+        partners = self.env['res.partner'].browse(list(subscribers))
+        by_lang = defaultdict(list)
+        for partner in partners:
+            by_lang[partner.lang or 'en_US'].append(partner)
+
+        mails = []
+        for lang, lang_partners in by_lang.items():
+            products = self.env['product.template'].with_context(lang=lang).browse(list(events))
+            products_by_id = {product.id: product for product in products}
+            for partner in lang_partners:
+                items = [
+                    {'product': products_by_id[product_id], 'events': events[product_id]}
+                    for product_id in subscribers[partner.id]
+                ]
+                body = self.env['ir.qweb'].with_context(lang=lang)._render('fashion_ecommerce.wishlist_digest_email', {
+                    'partner': partner,
+                    'items': items,
+                    'company': company,
+                    'base_url': base_url,
+                })
+                mails.append({
+                    'subject': f"{len(items)} item(s) from your wishlist at {company.name}",
+                    'body_html': body,
+                    'email_from': email_from,
+                    'recipient_ids': [(4, partner.id)],
+                    'auto_delete': True,
+                })
+        return mails
+
+    @api.model
+    def _cron_send_wishlist_notifications(self, batch_size=1000, max_batches=20):
+        """Fan queued product events out to one digest per wishlisting partner.
+
+        Mails are only created here; the standard mail queue sends them in
+        its own batches.
+        """
+        testing = getattr(threading.current_thread(), 'testing', False)
+        queued = 0
+        for _batch in range(max_batches):
+            start = time.perf_counter()
+            events = self._claim_events(batch_size)
+            if not events:
+                break
+            events = self._filter_current_events(events)
+            subscribers = self._get_subscribers(events) if events else {}
+            mails = self._prepare_digest_mails(events, subscribers) if subscribers else []
+            for offset in range(0, len(mails), WISHLIST_MAIL_CHUNK):
+                self.env['mail.mail'].sudo().create(mails[offset:offset + WISHLIST_MAIL_CHUNK])
+            queued += len(mails)
+            _logger.info(
+                f"Wishlist notifications: {len(events)} products, {len(mails)} digests queued "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            if not testing:
+                self.env.cr.commit()
+        if queued:
+            scheduler = self.env.ref('mail.ir_cron_mail_scheduler_action', raise_if_not_found=False)
+            if scheduler:
+                scheduler.sudo()._trigger()
@@ -64,5 +64,40 @@ odoo.define('fashion_ecommerce.wishlist', function (require) {
         }
     });
 
+    // Marks wishlisted products for every toggle of the page with a single request
+    publicWidget.registry.FashionWishlistStatus = publicWidget.Widget.extend({
+        selector: '#wrapwrap:has(.fashion-wishlist-toggle)',
+
+        start: function () {
+            var $toggles = this.$('.fashion-wishlist-toggle');
+            var productIds = $toggles.map(function () {
+                return $(this).data('product-id');
+            }).get();
+
+            if (!productIds.length || !$('body').hasClass('o_portal')) {
+                return this._super.apply(this, arguments);
+            }
+
+            ajax.jsonRpc('/shop/wishlist/status', 'call', {
+                'product_ids': productIds
+            }).then(function (result) {
+                if (result.error) {
+                    return;
+                }
+                $toggles.each(function () {
+                    var $btn = $(this);
+                    if (result.wishlisted.indexOf($btn.data('product-id')) !== -1) {
+                        $btn.addClass('in-wishlist')
+                            .find('i').removeClass('fa-heart-o').addClass('fa-heart');
+                        $btn.find('.wishlist-text').text('Remove from Wishlist');
+                    }
+                });
+                $('.wishlist-counter').text(result.count);
+            });
+
+            return this._super.apply(this, arguments);
+        }
+    });
+
     return publicWidget.registry.FashionWishlist;
 });
\ No newline at end of file
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import time
+
+from odoo.tools.lru import LRU
+
+_MISS = object()
+
+
+class FashionCache:
+    """In-process LRU cache with optional TTL and version stamping.
+
+    Entries are stored together with the version they were computed for;
+    a lookup with a different version is a miss. Combined with the database
+    version counters below, this gives caches that are shared across worker
+    processes without any cross-process communication besides one sequence
+    read.
+    """
+
+    def __init__(self, size=256, ttl=None):
+        self._entries = LRU(size)
+        self.ttl = ttl
+
+    def get(self, key, version=None, default=None):
+        entry = self._entries.get(key, _MISS)
+        if entry is _MISS:
+            return default
+        expires_at, entry_version, value = entry
+        if entry_version != version or (expires_at and expires_at < time.monotonic()):
+            self._discard(key)
+            return default
+        return value
+
+    def set(self, key, value, version=None):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (expires_at, version, value)
+        return value
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._discard(key)
+
+    def _discard(self, key):
+        try:
+            del self._entries[key]
+        except KeyError:
+            pass
+
+
+def _sequence_name(name):
+    return f'fashion_{name}_version_seq'
+
+
+def version_sequence(name):
+    """Return the name of the database sequence backing the version counter `name`"""
+    return _sequence_name(name)
+
+
+def ensure_version_counter(cr, name):
+    """Create the database sequence backing the version counter `name`"""
+    cr.execute(f'CREATE SEQUENCE IF NOT EXISTS {_sequence_name(name)}')
+
+
+def get_version(cr, name):
+    """Return the current value of the version counter `name`"""
+    cr.execute(f'SELECT last_value FROM {_sequence_name(name)}')
+    return cr.fetchone()[0]
+
+
+def bump_version_on_commit(cr, name):
+    """Increment the version counter `name` once the transaction commits.
+
+    Sequences are not transactional, so bumping after commit guarantees that
+    a worker observing the new version also sees the committed data.
+    """
+    pending = cr.postcommit.data.setdefault('fashion_version_bumps', set())
+    if not pending:
+        @cr.postcommit.add
+        def bump_versions():
+            for counter in sorted(cr.postcommit.data.pop('fashion_version_bumps', ())):
+                cr.execute(f"SELECT nextval('{_sequence_name(counter)}')")
+    pending.add(name)
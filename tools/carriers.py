@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Concurrent shipment status polling.
+
+Carriers are plain classes registered by code. The poller groups tracking
+numbers per carrier, sends them in batches with bounded overall concurrency
+and a token bucket per carrier, and returns the statuses it could fetch.
+Nothing here touches the database, so polling can be exercised and
+benchmarked offline with the bundled stub carrier::
+
+    python -m odoo.addons.fashion_ecommerce.tools.carriers 5000
+"""
+import asyncio
+import hashlib
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+
+_logger = logging.getLogger(__name__)
+
+SHIPMENT_STATUSES = [
+    ('pending', 'Pending'),
+    ('in_transit', 'In Transit'),
+    ('out_for_delivery', 'Out for Delivery'),
+    ('delivered', 'Delivered'),
+    ('exception', 'Exception'),
+]
+
+CARRIERS = {}
+
+
+def register_carrier(cls):
+    """Class decorator adding a carrier to the registry under its code"""
+    CARRIERS[cls.code] = cls
+    return cls
+
+
+class TokenBucket:
+    """Asynchronous token bucket allowing `rate` acquisitions per second with bursts of `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class Carrier:
+    """Base carrier client; subclasses implement `fetch_statuses`"""
+
+    code = None
+    name = None
+    # Requests per second allowed by the carrier and tracking numbers per request
+    rate_limit = 10
+    batch_size = 50
+
+    async def fetch_statuses(self, tracking_numbers):
+        """Return {tracking number: (status, status datetime)} for the numbers the carrier knows"""
+        raise NotImplementedError()
+
+
+@register_carrier
+class StubCarrier(Carrier):
+    """Local carrier simulating network latency and a deterministic parcel lifecycle"""
+
+    code = 'stub'
+    name = 'Local Stub Carrier'
+    rate_limit = 200
+    batch_size = 100
+    latency = 0.02
+
+    async def fetch_statuses(self, tracking_numbers):
+        await asyncio.sleep(self.latency)
+        now = datetime.utcnow().replace(microsecond=0)
+        statuses = {}
+        for tracking_number in tracking_numbers:
+            # The hash places each parcel at a stable point of its journey,
+            # which moves forward by one step every hour
+            seed = int(hashlib.sha1(tracking_number.encode()).hexdigest()[:8], 16)
+            step = (seed + now.hour) % 6
+            if seed % 50 == 0:
+                status = 'exception'
+            else:
+                status = ['pending', 'in_transit', 'in_transit', 'in_transit', 'out_for_delivery', 'delivered'][step]
+            statuses[tracking_number] = (status, now - timedelta(minutes=seed % 60))
+        return statuses
+
+
+async def _poll(shipments, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    results, failures = {}, 0
+
+    async def poll_batch(carrier, bucket, batch):
+        nonlocal failures
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                results.update(await carrier.fetch_statuses(batch))
+            except Exception as e:
+                failures += len(batch)
+                _logger.warning(f"Carrier {carrier.code} failed for {len(batch)} shipments: {str(e)}")
+
+    tasks = []
+    for code, tracking_numbers in shipments.items():
+        carrier_cls = CARRIERS.get(code)
+        if not carrier_cls:
+            failures += len(tracking_numbers)
+            _logger.warning(f"Unknown carrier {code}, skipping {len(tracking_numbers)} shipments")
+            continue
+        carrier = carrier_cls()
+        bucket = TokenBucket(carrier.rate_limit)
+        for start in range(0, len(tracking_numbers), carrier.batch_size):
+            tasks.append(poll_batch(carrier, bucket, tracking_numbers[start:start + carrier.batch_size]))
+    await asyncio.gather(*tasks)
+    return results, failures
+
+
+def poll_statuses(shipments, concurrency=10):
+    """Fetch statuses for {carrier code: [tracking numbers]}.
+
+    Returns ({tracking number: (status, datetime)}, stats) where stats holds
+    the number of shipments polled, failed and the throughput.
+    """
+    start = time.perf_counter()
+    results, failures = asyncio.run(_poll(shipments, concurrency))
+    duration = time.perf_counter() - start
+    total = sum(len(numbers) for numbers in shipments.values())
+    return results, {
+        'polled': total,
+        'fetched': len(results),
+        'failed': failures,
+        'duration': duration,
+        'per_second': total / duration if duration else 0.0,
+    }
+
+
+def benchmark(count=1000, concurrency=10, carrier='stub'):
+    """Poll `count` synthetic shipments and return the polling stats"""
+    shipments = {carrier: [f"BENCH-{index:08d}" for index in range(count)]}
+    return poll_statuses(shipments, concurrency)[1]
+
+
+if __name__ == '__main__':
+    stats = benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
+    print(f"{stats['polled']} shipments in {stats['duration']:.2f}s, {stats['per_second']:.0f} orders/s")
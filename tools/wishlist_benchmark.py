@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Wishlist page benchmark.
+
+Seeds a partner with a wishlist of products carrying a photo-like 1920px
+image, then renders the item grid the wishlist page had before pagination
+and the paginated one, reporting for each the read and render latency, the
+HTML bytes, and the bytes and serving time of the images the page makes the
+browser load. Everything runs in one transaction that is rolled back, with
+attachments stored in the database so nothing reaches the filestore::
+
+    python -m odoo.addons.fashion_ecommerce.tools.wishlist_benchmark -c odoo.conf -d mydb 500
+
+or, from ``odoo-bin shell``::
+
+    from odoo.addons.fashion_ecommerce.tools.wishlist_benchmark import run
+    run(env, 500)
+"""
+import base64
+import io
+import logging
+import sys
+import time
+from types import SimpleNamespace
+
+from lxml import etree
+from PIL import Image
+
+from odoo.tools.image import image_process
+
+_logger = logging.getLogger(__name__)
+
+# Item grid of the wishlist page before pagination
+LEGACY_GRID = """
+<div class="row">
+    <t t-foreach="wishlist_items" t-as="item">
+        <div class="col-md-4 col-lg-3 mb-4">
+            <div class="card h-100">
+                <t t-if="item.product_id.image_1920">
+                    <img t-att-src="'/web/image/fashion.wishlist/%s/product_image/300x300' % item.id"
+                         class="card-img-top" style="height: 200px; object-fit: cover;"
+                         t-att-alt="item.product_name"/>
+                </t>
+                <div class="card-body">
+                    <h6 class="card-title" t-esc="item.product_name"/>
+                    <p class="card-text">
+                        <small class="text-muted">
+                            Brand: <t t-esc="item.product_brand or 'N/A'"/>
+                        </small>
+                    </p>
+                    <div class="d-flex justify-content-between align-items-center">
+                        <span class="h6 text-primary">$<t t-esc="item.product_price"/></span>
+                        <div>
+                            <form action="/shop/cart/update" method="post" class="d-inline">
+                                <input type="hidden" name="product_id" t-att-value="item.product_id.product_variant_id.id"/>
+                                <input type="hidden" name="csrf_token" t-att-value="request.csrf_token()"/>
+                                <button type="submit" class="btn btn-sm btn-primary">Add to Cart</button>
+                            </form>
+                            <a t-att-href="'/shop/wishlist/remove/%s' % item.id" class="btn btn-sm btn-outline-danger ms-1">
+                                <i class="fa fa-trash"></i>
+                            </a>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </t>
+</div>
+"""
+
+
+def _seed(env, items):
+    """Create a partner wishlisting `items` new products and return its id"""
+    # Image attachments go to the database so the rollback removes them too
+    env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'db')
+    buffer = io.BytesIO()
+    Image.effect_noise((1920, 1920), 64).convert('RGB').save(buffer, format='JPEG', quality=85)
+    image = base64.b64encode(buffer.getvalue())
+    products = env['product.template'].create([{
+        'name': f"Wishlist Benchmark {index:04d}",
+        'brand': 'Benchmark',
+        'list_price': 10.0 + index % 90,
+        'type': 'product',
+        'image_1920': image,
+    } for index in range(items)])
+    partner = env['res.partner'].create({'name': 'Wishlist Benchmark', 'email': 'wishlist.benchmark@example.com'})
+    env['fashion.wishlist'].create([{'partner_id': partner.id, 'product_id': product.id} for product in products])
+    env.flush_all()
+    return partner.id
+
+
+def _measure(env, partner_id, limit):
+    Wishlist = env['fashion.wishlist']
+    QWeb = env['ir.qweb']
+    # The grids post to the cart; a fixed-size token stands in for the session one
+    values = {'request': SimpleNamespace(csrf_token=lambda: 'x' * 40)}
+
+    env.invalidate_all()
+    start = time.perf_counter()
+    wishlist_items = Wishlist.search([('partner_id', '=', partner_id)])
+    before_html = QWeb._render(etree.fromstring(LEGACY_GRID), dict(values, wishlist_items=wishlist_items))
+    before_render = time.perf_counter() - start
+    # /web/image resized the full-size image of every item on each request
+    start = time.perf_counter()
+    before_image_bytes = sum(
+        len(image_process(base64.b64decode(item.product_id.image_1920), size=(300, 300)))
+        for item in wishlist_items
+    )
+    before_images = time.perf_counter() - start
+
+    env.invalidate_all()
+    start = time.perf_counter()
+    page = Wishlist._get_wishlist_page(partner_id, limit=limit)
+    after_html = QWeb._render('fashion_ecommerce.wishlist_items', dict(values, wishlist_items=page['items']))
+    after_render = time.perf_counter() - start
+    # Stored thumbnails are served as they are
+    start = time.perf_counter()
+    products = env['product.template'].browse([item['product_id'] for item in page['items']])
+    after_image_bytes = sum(len(base64.b64decode(product.image_256)) for product in products)
+    after_images = time.perf_counter() - start
+
+    return {
+        'before': {
+            'items': len(wishlist_items),
+            'render': before_render,
+            'html_bytes': len(before_html.encode()),
+            'images': before_images,
+            'image_bytes': before_image_bytes,
+        },
+        'after': {
+            'items': len(page['items']),
+            'render': after_render,
+            'html_bytes': len(after_html.encode()),
+            'images': after_images,
+            'image_bytes': after_image_bytes,
+        },
+    }
+
+
+def run(env, items=500, limit=24):
+    """Seed, measure and roll back; return {'before': stats, 'after': stats}"""
+    env.cr.execute("SAVEPOINT fashion_wishlist_benchmark")
+    try:
+        stats = _measure(env, _seed(env, items), limit)
+    finally:
+        env.cr.execute("ROLLBACK TO SAVEPOINT fashion_wishlist_benchmark")
+        env.invalidate_all()
+    for variant, figures in stats.items():
+        _logger.info(
+            f"Wishlist page {variant}: {figures['items']} items rendered in {figures['render'] * 1000:.1f}ms, "
+            f"{figures['html_bytes']} HTML bytes; {figures['image_bytes']} image bytes "
+            f"served in {figures['images'] * 1000:.1f}ms"
+        )
+    return stats
+
+
+if __name__ == '__main__':
+    import odoo
+    from odoo import api, SUPERUSER_ID
+
+    args = sys.argv[1:]
+    items = int(args.pop()) if args and args[-1].isdigit() else 500
+    odoo.tools.config.parse_config(args)
+    registry = odoo.modules.registry.Registry(odoo.tools.config['db_name'])
+    with registry.cursor() as cr:
+        stats = run(api.Environment(cr, SUPERUSER_ID, {}), items)
+        cr.rollback()
+    for variant, figures in stats.items():
+        print(f"{variant:>6}: {figures['items']} items, {figures['render'] * 1000:.1f}ms render, "
+              f"{figures['html_bytes']} HTML bytes, {figures['image_bytes']} image bytes "
+              f"in {figures['images'] * 1000:.1f}ms")